@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Time each stage of the render pipeline and write the results as JSON.
+
+Run from the repository root:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --compare bench.json
+
+Notes:
+    Every benchmark runs over all sprite sheets in assets/sprites, against an
+    in memory SQLite database seeded with the fixed rows from db/pokedefaults.py
+    and one placeholder species per sprite sheet.
+
+    A benchmark times a batch of calls, one per item, repeat times. Results are
+    reported per call in microseconds, best and median of the repeats. Timings
+    after the first repeat are warm, so cached stages show their cached cost.
+
+"""
+
+from statistics import median
+from typing import Callable, Dict, List, Sequence
+from PIL import Image  # type: ignore
+from sqlalchemy import create_engine  # type: ignore
+from sqlalchemy.orm import sessionmaker  # type: ignore
+from dex.font import Font
+from dex.poke import DexSnapshot, Pokemon
+from dex.render import entry_wrap, gsc_format, render_frame
+import dex.assets as assets
+import dex.util as util
+import db.pokedefaults as pokedefaults  # type: ignore
+import db.pokeschema as pokeschema  # type: ignore
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+ENTRIES = (
+    "It is virtually worthless in terms of both power and speed. It is the most weak and pathetic POKéMON.",
+    "Its genetic code is irregular. It may mutate if it is exposed to radiation from element stones.",
+    "It's said that it can't stay still for long, so it's always on the move.",
+    "Once it begins to rampage, a GYARADOS will burn everything down, even in a harsh storm.",
+)
+CLASSIFICATIONS = ("fish", "evolution", "atrocious", "bubble jet", "lightning", "flame")
+
+
+def seed_database(session, ids: Sequence[int]) -> None:
+    """Fill a fresh database with the fixed rows and a placeholder species per id.
+
+    Args:
+        session: Session bound to a database with the dex tables created
+        ids:     National dex ids to add a species for
+
+    """
+    pokedefaults.add_types(session)
+    pokedefaults.add_egg_groups(session)
+    pokedefaults.add_damage_categories(session)
+    pokedefaults.add_obtain_methods(session)
+    pokedefaults.add_evo_triggers(session)
+    pokedefaults.add_learn_methods(session)
+    session.flush()
+
+    for index, id in enumerate(ids):
+        session.add(
+            pokeschema.Pokemon(
+                id=id,
+                species=f"species{id:03d}",
+                classification=CLASSIFICATIONS[index % len(CLASSIFICATIONS)],
+                type1_id=1 + index % 17,
+                height=round(0.3 + index * 0.1, 1),
+                weight=round(4.0 + index * 2.5, 1),
+                egg1_id=1 + index % 15,
+            )
+        )
+        session.add(pokeschema.Entry(pokemon_id=id, entry=ENTRIES[index % len(ENTRIES)]))
+    session.commit()
+
+
+def bench(func: Callable[[object], object], items: Sequence, repeat: int) -> Dict[str, float]:
+    """Time one call of func per item, repeat times.
+
+    Args:
+        func:   Callable taking a single item
+        items:  Items to call func with, once each per repeat
+        repeat: Number of timed passes over the items
+
+    Returns:
+        Best and median time per call in microseconds, with the batch size and repeat count
+
+    """
+    passes = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        passes.append((time.perf_counter() - start) / len(items) * 1e6)
+    return {"best_us": min(passes), "median_us": median(passes), "calls": len(items), "repeat": repeat}
+
+
+def run(repeat: int = 5, font_file: str = "assets/ui/gscfont.png") -> Dict:
+    """Run every benchmark.
+
+    Args:
+        repeat:    Number of timed passes per benchmark
+        font_file: Font sheet to render with
+
+    Returns:
+        Environment details and a result per benchmark
+
+    """
+    random.seed(0)
+    ids = assets.pool.sprite_ids()
+    sheets = [assets.pool.open(f"sprites/{id:03d}.png") for id in ids]
+    frames = [sheet.crop(frame) for sheet in sheets for frame in assets.SPRITE_FRAMES]
+
+    engine = create_engine("sqlite://")
+    pokeschema.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    seed_database(session, ids)
+    snapshot = DexSnapshot.load(session)
+
+    font = Font(font_file)
+    characters = list(dict.fromkeys(font.sheetstring))
+    lines = [gsc_format(entry) for entry in ENTRIES]
+    words = [word for line in lines for word in line.split(" ")]
+    numerals = [record.height for record in snapshot] + [record.weight for record in snapshot] + list(ids)
+    mons = [Pokemon(id, snapshot=snapshot) for id in ids]
+
+    def frame(mon: Pokemon) -> None:
+        render_frame(Image.new("P", (212, 104)), font, mon, variant=0)
+
+    results = {
+        "font.load": bench(Font, [font_file] * 4, repeat),
+        "alpha_plane": bench(util.alpha_plane, frames, repeat),
+        "font.get_character": bench(font.get_character, characters, repeat),
+        "font.get_string": bench(font.get_string, words, repeat),
+        "font.build_string": bench(font.build_string, words, repeat),
+        "font.get_numeral": bench(font.get_numeral, numerals, repeat),
+        "font.build_numeral": bench(font.build_numeral, numerals, repeat),
+        "entry_wrap": bench(entry_wrap, lines * len(ids), repeat),
+        "pokemon.session": bench(lambda id: Pokemon(id, session), ids, repeat),
+        "pokemon.snapshot": bench(lambda id: Pokemon(id, snapshot=snapshot), ids, repeat),
+        "render_frame": bench(frame, mons, repeat),
+    }
+    session.close()
+
+    return {
+        "python": platform.python_version(),
+        "pillow": Image.__version__,
+        "platform": platform.platform(),
+        "sprites": len(ids),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """List benchmarks whose best time grew past threshold times the baseline.
+
+    Args:
+        report:    Results of this run
+        baseline:  Results of an earlier run to compare against
+        threshold: Allowed ratio of this run's best time over the baseline's
+
+    """
+    regressions = []
+    for name, result in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        ratio = result["best_us"] / previous["best_us"]
+        print(f"{name:20} {previous['best_us']:10.1f} -> {result['best_us']:10.1f} us  x{ratio:.2f}", file=sys.stderr)
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each stage of the render pipeline.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per benchmark")
+    parser.add_argument("--font", default="assets/ui/gscfont.png", help="font sheet to render with")
+    parser.add_argument("--output", help="file to write the JSON results to, stdout if not given")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to check this run against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    report = run(args.repeat, args.font)
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump(report, out, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"Regressed: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
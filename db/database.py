@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Own the engine of the dex database and hand out thread-local sessions.
+
+Notes:
+    The dex only reads its database, so SQLite files are opened read-only
+    through a mode=ro URI and every pooled connection is tuned for reads:
+    memory mapped I/O, a larger page cache and in-memory temporary tables.
+    The journal mode is a property of the file, db.importer leaves it in WAL
+    so readers never block on a write.
+
+    Engines are created once per url and kept, so every render reuses the
+    same pool of warmed connections. Sessions are scoped to the calling
+    thread, so concurrent handlers each get their own session on the shared
+    engine.
+
+"""
+
+from typing import Dict
+from sqlalchemy import create_engine, event  # type: ignore
+from sqlalchemy.engine import Engine, make_url  # type: ignore
+from sqlalchemy.orm import Session, configure_mappers, scoped_session, sessionmaker  # type: ignore
+import db.pokeschema as pokeschema  # type: ignore
+import threading
+
+DEFAULT_URL = "sqlite:///poke.db"
+READ_PRAGMAS = (
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA query_only = ON",
+)
+
+
+def readonly_url(url: str) -> str:
+    """Rewrite a SQLite file url to open the file read-only, other urls are returned unchanged.
+
+    Args:
+        url: SQLAlchemy database url, such as sqlite:///poke.db
+
+    Returns:
+        The url of the same file as a mode=ro SQLite URI
+
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        return url
+    if parsed.query.get("uri") == "true":
+        return str(parsed.update_query_dict({"mode": "ro"}))
+    return str(parsed.set(database=f"file:{parsed.database}").update_query_dict({"mode": "ro", "uri": "true"}))
+
+
+def tune(connection, _record) -> None:
+    """Apply the read PRAGMAs to a new SQLite connection."""
+    cursor = connection.cursor()
+    for pragma in READ_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+class Database:
+    """Engine and thread-local sessions for one database.
+
+    Attributes:
+        url (str): Database url as given, before the read-only rewrite
+        engine (Engine): Engine whose pooled connections every session shares
+        sessions (scoped_session): Registry handing each thread its own session
+
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, readonly: bool = True):
+        """Create the engine and session registry.
+
+        Args:
+            url:      SQLAlchemy database url
+            readonly: Open SQLite files read-only with the read PRAGMAs applied
+
+        """
+        self.url = url
+        self.engine: Engine = create_engine(readonly_url(url) if readonly else url)
+        if readonly and self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", tune)
+        self.sessions = scoped_session(sessionmaker(bind=self.engine))
+
+    def session(self) -> Session:
+        """Return the calling thread's session, creating it on first use."""
+        return self.sessions()
+
+    def warm(self) -> None:
+        """Configure the mappers and open a tuned connection, so the first render pays neither."""
+        configure_mappers()
+        with self.engine.connect() as connection:
+            connection.exec_driver_sql(f"SELECT 1 FROM {pokeschema.Pokemon.__tablename__} LIMIT 1")
+
+    def remove(self) -> None:
+        """Close the calling thread's session, returning its connection to the pool."""
+        self.sessions.remove()
+
+    def close(self) -> None:
+        """Close the calling thread's session and every pooled connection."""
+        self.sessions.remove()
+        self.engine.dispose()
+
+    def __repr__(self) -> str:
+        return f"Database(url='{self.url}')"
+
+
+databases: Dict[str, Database] = {}
+databases_lock = threading.Lock()
+
+
+def open_database(url: str = DEFAULT_URL) -> Database:
+    """Return the shared read-only database for a url, creating and warming it on first use.
+
+    Args:
+        url: SQLAlchemy database url
+
+    """
+    with databases_lock:
+        if url not in databases:
+            database = Database(url)
+            database.warm()
+            databases[url] = database
+        return databases[url]
+
+
+def get_session(url: str = DEFAULT_URL) -> Session:
+    """Return the calling thread's session on the shared database for a url."""
+    return open_database(url).session()
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Bulk load the dex database from CSV and JSON source files.
+
+Run from the repository root:
+
+    python -m db.importer data/ --database sqlite:///poke.db
+
+Notes:
+    A source directory holds one file per table, named after the table:
+    pokemon.csv, learns.jsonl, moves.json and so on. CSV files have a header
+    row naming the columns and an empty cell is NULL, JSON files hold a list
+    of objects and JSON lines files one object per line. Files are streamed,
+    so only one batch of rows is held in memory at a time.
+
+    Tables are loaded parents first. Each batch is inserted with a single
+    Core executemany in its own transaction, as an upsert on the primary key,
+    so re-running an import updates changed rows instead of failing on
+    duplicates. Rows without a primary key are matched on the table's unique
+    index instead, such as entries given without an id on their species and
+    text, and are rejected if the table has none.
+
+    During the load the connection skips fsync and foreign key checks and
+    keeps its journal and temporary tables in memory. Secondary indexes are
+    dropped first and rebuilt once at the end, along with the full-text
+    index of db.search, followed by ANALYZE. Unique indexes are kept and
+    created up front instead, since upserts match rows on them. The file is
+    left in WAL mode for the read-only connections of db.database.
+
+"""
+
+from contextlib import contextmanager
+from itertools import groupby
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import Boolean, Float, Integer, Table, create_engine, event, text  # type: ignore
+from sqlalchemy.dialects.sqlite import insert  # type: ignore
+from sqlalchemy.engine import Engine  # type: ignore
+import db.pokedefaults as pokedefaults  # type: ignore
+import db.pokeschema as pokeschema  # type: ignore
+import db.search as search  # type: ignore
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+
+BATCH_SIZE = 5000
+EXTENSIONS = (".csv", ".jsonl", ".json")
+BULK_PRAGMAS = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA foreign_keys = OFF",
+)
+
+
+def parse_bool(value: str) -> bool:
+    """Read a CSV boolean, accepting 1/0, true/false and yes/no."""
+    if value.lower() in ("1", "true", "yes", "y", "t"):
+        return True
+    if value.lower() in ("0", "false", "no", "n", "f"):
+        return False
+    raise ValueError(f"Not a boolean: {value!r}")
+
+
+def converters(table: Table) -> Dict[str, Callable[[str], object]]:
+    """Map each column of a table to the function reading it from CSV text."""
+    result: Dict[str, Callable[[str], object]] = {}
+    for column in table.columns:
+        if isinstance(column.type, Boolean):
+            result[column.name] = parse_bool
+        elif isinstance(column.type, Integer):
+            result[column.name] = int
+        elif isinstance(column.type, Float):
+            result[column.name] = float
+        else:
+            result[column.name] = str
+    return result
+
+
+def read_csv(path: str, table: Table) -> Iterator[Dict]:
+    """Stream the rows of a CSV file as column dictionaries, with empty cells as None.
+
+    Raises:
+        ValueError: The header names a column the table does not have
+
+    """
+    convert = converters(table)
+    with open(path, newline="", encoding="utf-8") as source:
+        reader = csv.DictReader(source)
+        unknown = set(reader.fieldnames or ()) - set(convert)
+        if unknown:
+            raise ValueError(f"{path}: {table.name} has no columns {', '.join(sorted(unknown))}")
+        for row in reader:
+            yield {name: convert[name](value) if value != "" else None for name, value in row.items()}
+
+
+def read_json(path: str, table: Table) -> Iterator[Dict]:
+    """Stream the objects of a JSON list or JSON lines file.
+
+    Raises:
+        ValueError: An object has a key the table does not have
+
+    """
+    with open(path, encoding="utf-8") as source:
+        if path.endswith(".jsonl"):
+            rows: Iterable[Dict] = (json.loads(line) for line in source if line.strip())
+        else:
+            rows = json.load(source)
+        columns = set(table.columns.keys())
+        for row in rows:
+            unknown = set(row) - columns
+            if unknown:
+                raise ValueError(f"{path}: {table.name} has no columns {', '.join(sorted(unknown))}")
+            yield row
+
+
+def read_rows(path: str, table: Table) -> Iterator[Dict]:
+    """Stream the rows of a source file, by its extension."""
+    if path.endswith(".csv"):
+        return read_csv(path, table)
+    return read_json(path, table)
+
+
+def batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    """Group rows into lists of at most size rows."""
+    batch: List[Dict] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def natural_key(table: Table) -> Optional[Tuple[str, ...]]:
+    """Return the columns of a table's first unique index, which identify rows given without a primary key."""
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        if index.unique:
+            return tuple(column.name for column in index.columns)
+    return None
+
+
+def upsert(table: Table, conflict: Sequence[str], columns: Sequence[str]):
+    """Build an insert that updates the existing row when its conflict key is already present.
+
+    Args:
+        table:    Table to insert into
+        conflict: Columns of the primary key or unique index identifying a row
+        columns:  Columns the rows give, only these are updated on a conflict
+
+    Notes:
+        Rows whose every other column is part of the key have nothing to
+        update, so duplicates are skipped.
+
+    """
+    statement = insert(table)
+    values = {
+        name: statement.excluded[name]
+        for name in columns
+        if not table.columns[name].primary_key and name not in conflict
+    }
+    if not values:
+        return statement.on_conflict_do_nothing(index_elements=list(conflict))
+    return statement.on_conflict_do_update(index_elements=list(conflict), set_=values)
+
+
+def load_rows(engine: Engine, table: Table, rows: Iterable[Dict], batch_size: int = BATCH_SIZE) -> int:
+    """Upsert rows into a table, one transaction per batch.
+
+    Args:
+        engine:     Engine of the database to load
+        table:      Table the rows belong to
+        rows:       Column dictionaries to insert
+        batch_size: Rows inserted per executemany and transaction
+
+    Returns:
+        Number of rows loaded
+
+    Raises:
+        ValueError: A row has no primary key and the table has no natural key,
+            or the row leaves a natural key column empty
+
+    Notes:
+        Consecutive rows giving the same columns share an executemany. A
+        column a row leaves out keeps its stored value, or its default on
+        insert, rather than being set to NULL.
+
+    """
+    keys = tuple(table.primary_key.columns.keys())
+    natural = natural_key(table)
+    statements: Dict[Tuple, object] = {}
+
+    def conflict(row: Dict) -> Tuple[str, ...]:
+        if all(row.get(key) is not None for key in keys):
+            return keys
+        if natural is not None and all(row.get(column) is not None for column in natural):
+            return natural
+        needed = " or ".join(", ".join(columns) for columns in (keys, natural) if columns)
+        raise ValueError(f"{table.name} row {row} has no {needed} to identify it")
+
+    count = 0
+    for batch in batches(rows, batch_size):
+        with engine.begin() as connection:
+            for (columns, target), group in groupby(batch, key=lambda row: (tuple(row), conflict(row))):
+                if (columns, target) not in statements:
+                    statements[columns, target] = upsert(table, target, columns)
+                connection.execute(statements[columns, target], list(group))
+        count += len(batch)
+    return count
+
+
+def source_files(directory: str) -> List[Tuple[Table, str]]:
+    """Find the source file of each table in a directory, in load order.
+
+    Raises:
+        ValueError: A table has more than one source file
+
+    """
+    found = []
+    for table in pokeschema.Base.metadata.sorted_tables:
+        paths = [os.path.join(directory, table.name + ext) for ext in EXTENSIONS]
+        paths = [path for path in paths if os.path.exists(path)]
+        if len(paths) > 1:
+            raise ValueError(f"{table.name} has more than one source file: {', '.join(paths)}")
+        found.extend((table, path) for path in paths)
+    return found
+
+
+@contextmanager
+def bulk_load(engine: Engine) -> Iterator[None]:
+    """Tune the engine's connections for bulk loading and rebuild secondary and search indexes afterwards.
+
+    Notes:
+        The pool is disposed on entry and exit, so only connections opened
+        during the load get the bulk PRAGMAs.
+
+    """
+
+    def tune(connection, _record) -> None:
+        cursor = connection.cursor()
+        for pragma in BULK_PRAGMAS:
+            cursor.execute(pragma)
+        cursor.close()
+
+    pokeschema.Base.metadata.create_all(engine)
+    tables = pokeschema.Base.metadata.sorted_tables
+    indexes = [index for table in tables for index in table.indexes if not index.unique]
+    engine.dispose()
+    event.listen(engine, "connect", tune)
+    try:
+        with engine.begin() as connection:
+            for index in indexes:
+                index.drop(connection, checkfirst=True)
+            for table in tables:
+                for index in table.indexes:
+                    if index.unique:
+                        index.create(connection, checkfirst=True)
+            search.drop_triggers(connection)
+        yield
+    finally:
+        with engine.begin() as connection:
+            for index in indexes:
+                index.create(connection, checkfirst=True)
+            search.create_index(connection)
+            connection.execute(text("ANALYZE"))
+        event.remove(engine, "connect", tune)
+        engine.dispose()
+        if engine.dialect.name == "sqlite":
+            with engine.connect() as connection:
+                connection.exec_driver_sql("PRAGMA journal_mode = WAL")
+
+
+def import_defaults(engine: Engine) -> int:
+    """Upsert the fixed rows from db.pokedefaults, returning the number of rows loaded."""
+    tables = pokeschema.Base.metadata.tables
+    return sum(load_rows(engine, tables[name], rows) for name, rows in pokedefaults.defaults())
+
+
+def import_directory(
+    engine: Engine, directory: Optional[str], batch_size: int = BATCH_SIZE, defaults: bool = True
+) -> Dict[str, int]:
+    """Load the fixed rows and every source file in a directory.
+
+    Args:
+        engine:     Engine of the database to load, its tables are created if missing
+        directory:  Directory of source files named after their tables, only the defaults if None
+        batch_size: Rows inserted per executemany and transaction
+        defaults:   Upsert the fixed rows from db.pokedefaults first
+
+    Returns:
+        Number of rows loaded per table
+
+    """
+    logger = logging.getLogger(__name__)
+    counts: Dict[str, int] = {}
+    with bulk_load(engine):
+        if defaults:
+            counts["defaults"] = import_defaults(engine)
+        for table, path in source_files(directory) if directory else ():
+            start = time.perf_counter()
+            counts[table.name] = load_rows(engine, table, read_rows(path, table), batch_size)
+            logger.info(f"Loaded {counts[table.name]} rows into {table.name} in {time.perf_counter() - start:.2f}s")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk load the dex database from CSV and JSON files.")
+    parser.add_argument("source", nargs="?", help="directory of source files named after their tables")
+    parser.add_argument("--database", default="sqlite:///poke.db", help="database url")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="rows per insert and transaction")
+    parser.add_argument("--no-defaults", action="store_true", help="skip the fixed rows from db.pokedefaults")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    counts = import_directory(create_engine(args.database), args.source, args.batch_size, not args.no_defaults)
+    print(f"Loaded {sum(counts.values())} rows in {time.perf_counter() - start:.2f}s")
@@ -1,102 +1,127 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""Add default rows to fixed tables in database."""
-
-import pokeschema
+"""Add default rows to fixed tables in database.
+
+Notes:
+    Rows are numbered from 1 in the order listed, so seeding is repeatable and
+    db.importer can upsert them into an existing database.
+
+"""
+
+from typing import Dict, List, Sequence, Tuple
+import db.pokeschema as pokeschema  # type: ignore
+
+TYPES = (
+    "normal",
+    "fighting",
+    "flying",
+    "poison",
+    "ground",
+    "rock",
+    "bug",
+    "ghost",
+    "steel",
+    "fire",
+    "water",
+    "grass",
+    "electric",
+    "psychic",
+    "ice",
+    "dragon",
+    "dark",
+    "???",
+)
+EGG_GROUPS = (
+    "monster",
+    "water 1",
+    "bug",
+    "flying",
+    "field",
+    "fairy",
+    "grass",
+    "human-like",
+    "water 3",
+    "mineral",
+    "amorphous",
+    "water 2",
+    "ditto",
+    "dragon",
+    "undiscovered",
+)
+DAMAGE_CATEGORIES = (
+    "physical",
+    "special",
+    "status",
+)
+OBTAIN_METHODS = (
+    "catch",
+    "fish",
+    "trade",
+    "purchase",
+    "gift",
+    "hatch",
+    "evolve",
+    "find",
+)
+EVO_TRIGGERS = (
+    "level",
+    "item",
+    "trade",
+)
+LEARN_METHODS = (
+    "level",
+    "machine",
+    "egg",
+    "tutor",
+)
+
+
+def rows(values: Sequence[str], column: str) -> List[Dict]:
+    """Number default values from 1 as rows of a lookup table.
+
+    Args:
+        values: Values in id order
+        column: Name of the value column
+
+    """
+    return [{"id": id, column: value} for id, value in enumerate(values, 1)]
+
+
+def defaults() -> List[Tuple[str, List[Dict]]]:
+    """Return the rows of every fixed table, as (table name, rows) pairs."""
+    return [
+        (pokeschema.Type.__tablename__, rows(TYPES, "type")),
+        (pokeschema.EggGroup.__tablename__, rows(EGG_GROUPS, "group")),
+        (pokeschema.DamageCategory.__tablename__, rows(DAMAGE_CATEGORIES, "category")),
+        (pokeschema.ObtainMethod.__tablename__, rows(OBTAIN_METHODS, "method")),
+        (pokeschema.EvoTrigger.__tablename__, rows(EVO_TRIGGERS, "trigger")),
+        (pokeschema.LearnMethod.__tablename__, rows(LEARN_METHODS, "method")),
+    ]
 
 
 def add_types(session) -> None:
-    session.add_all(
-        [
-            pokeschema.Type(type="normal"),
-            pokeschema.Type(type="fighting"),
-            pokeschema.Type(type="flying"),
-            pokeschema.Type(type="poison"),
-            pokeschema.Type(type="ground"),
-            pokeschema.Type(type="rock"),
-            pokeschema.Type(type="bug"),
-            pokeschema.Type(type="ghost"),
-            pokeschema.Type(type="steel"),
-            pokeschema.Type(type="fire"),
-            pokeschema.Type(type="water"),
-            pokeschema.Type(type="grass"),
-            pokeschema.Type(type="electric"),
-            pokeschema.Type(type="psychic"),
-            pokeschema.Type(type="ice"),
-            pokeschema.Type(type="dragon"),
-            pokeschema.Type(type="dark"),
-            pokeschema.Type(type="???"),
-        ]
-    )
+    session.add_all([pokeschema.Type(**row) for row in rows(TYPES, "type")])
 
 
 def add_egg_groups(session) -> None:
-    session.add_all(
-        [
-            pokeschema.EggGroup(group="monster"),
-            pokeschema.EggGroup(group="water 1"),
-            pokeschema.EggGroup(group="bug"),
-            pokeschema.EggGroup(group="flying"),
-            pokeschema.EggGroup(group="field"),
-            pokeschema.EggGroup(group="fairy"),
-            pokeschema.EggGroup(group="grass"),
-            pokeschema.EggGroup(group="human-like"),
-            pokeschema.EggGroup(group="water 3"),
-            pokeschema.EggGroup(group="mineral"),
-            pokeschema.EggGroup(group="amorphous"),
-            pokeschema.EggGroup(group="water 2"),
-            pokeschema.EggGroup(group="ditto"),
-            pokeschema.EggGroup(group="dragon"),
-            pokeschema.EggGroup(group="undiscovered"),
-        ]
-    )
+    session.add_all([pokeschema.EggGroup(**row) for row in rows(EGG_GROUPS, "group")])
 
 
 def add_damage_categories(session) -> None:
-    session.add_all(
-        [
-            pokeschema.DamageCategory(category="physical"),
-            pokeschema.DamageCategory(category="special"),
-            pokeschema.DamageCategory(category="status"),
-        ]
-    )
+    session.add_all([pokeschema.DamageCategory(**row) for row in rows(DAMAGE_CATEGORIES, "category")])
 
 
 def add_obtain_methods(session) -> None:
-    session.add_all(
-        [
-            pokeschema.ObtainMethod(method="catch"),
-            pokeschema.ObtainMethod(method="fish"),
-            pokeschema.ObtainMethod(method="trade"),
-            pokeschema.ObtainMethod(method="purchase"),
-            pokeschema.ObtainMethod(method="gift"),
-            pokeschema.ObtainMethod(method="hatch"),
-            pokeschema.ObtainMethod(method="evolve"),
-            pokeschema.ObtainMethod(method="find"),
-        ]
-    )
+    session.add_all([pokeschema.ObtainMethod(**row) for row in rows(OBTAIN_METHODS, "method")])
 
 
 def add_evo_triggers(session) -> None:
-    session.add_all(
-        [
-            pokeschema.EvoTrigger(trigger="level"),
-            pokeschema.EvoTrigger(trigger="item"),
-            pokeschema.EvoTrigger(trigger="trade"),
-        ]
-    )
+    session.add_all([pokeschema.EvoTrigger(**row) for row in rows(EVO_TRIGGERS, "trigger")])
 
 
 def add_learn_methods(session) -> None:
-    session.add_all(
-        [
-            pokeschema.LearnMethod(method="level"),
-            pokeschema.LearnMethod(method="machine"),
-            pokeschema.LearnMethod(method="egg"),
-            pokeschema.LearnMethod(method="tutor"),
-        ]
-    )
+    session.add_all([pokeschema.LearnMethod(**row) for row in rows(LEARN_METHODS, "method")])
 
 
 if __name__ == "__main__":
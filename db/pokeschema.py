@@ -3,7 +3,7 @@
 
 """Generate schema and sqlalchemy table mappings."""
 
-from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey  # type: ignore
+from sqlalchemy import Column, Integer, String, Boolean, Float, ForeignKey, Index  # type: ignore
 from sqlalchemy.orm import relationship  # type: ignore
 from sqlalchemy.ext.declarative import declarative_base  # type: ignore
 
@@ -91,7 +91,7 @@ class Pokemon(Base):  # type: ignore
         )
         }
         Pre-Evolution:
-        {(TAB) + self.pre_evo.pre_evo_id:03d}: {self.pre_evo.pre_evo.species}
+        {TAB}{self.pre_evo.pre_evo_id:03d}: {self.pre_evo.pre_evo.species}
 
         Entries:
         {(TAB) + (NLT).join([entry.entry for entry in self.entries])}
@@ -136,7 +136,7 @@ class Evolution(Base):  # type: ignore
 
     pre_evo_id = Column(Integer, ForeignKey("pokemon.id"), primary_key=True)
     pre_evo = relationship("Pokemon", foreign_keys=[pre_evo_id], back_populates="evos")
-    evo_id = Column(Integer, ForeignKey("pokemon.id"), primary_key=True)
+    evo_id = Column(Integer, ForeignKey("pokemon.id"), primary_key=True, index=True)
     evo = relationship("Pokemon", foreign_keys=[evo_id], back_populates="pre_evo")
     trigger_id = Column(Integer, ForeignKey("evolution_triggers.id"), nullable=False)
     trigger = relationship("EvoTrigger")
@@ -180,7 +180,7 @@ class Learns(Base):  # type: ignore
 
     pokemon_id = Column(Integer, ForeignKey("pokemon.id"), primary_key=True)
     pokemon = relationship("Pokemon", back_populates="moves")
-    move_id = Column(Integer, ForeignKey("moves.id"), primary_key=True)
+    move_id = Column(Integer, ForeignKey("moves.id"), primary_key=True, index=True)
     move = relationship("Move", back_populates="pokemon")
     method_id = Column(Integer, ForeignKey("learn_methods.id"), nullable=False)
     method = relationship("LearnMethod")
@@ -263,7 +263,7 @@ class PokemonObtain(Base):  # type: ignore
 
     pokemon_id = Column(Integer, ForeignKey("pokemon.id"), primary_key=True)
     pokemon = relationship("Pokemon", back_populates="locations")
-    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True, index=True)
     location = relationship("Location", back_populates="pokemon")
     method_id = Column(Integer, ForeignKey("obtain_methods.id"), nullable=False)
     method = relationship("ObtainMethod")
@@ -290,7 +290,7 @@ class ItemObtain(Base):  # type: ignore
 
     item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
     item = relationship("Item", back_populates="locations")
-    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True)
+    location_id = Column(Integer, ForeignKey("locations.id"), primary_key=True, index=True)
     location = relationship("Location", back_populates="items")
     method_id = Column(Integer, ForeignKey("obtain_methods.id"), nullable=False)
     method = relationship("ObtainMethod")
@@ -361,6 +361,7 @@ class Location(Base):  # type: ignore
 
 class Entry(Base):  # type: ignore
     __tablename__ = "entries"
+    __table_args__ = (Index("ix_entries_pokemon_id_entry", "pokemon_id", "entry", unique=True),)
 
     id = Column(Integer, primary_key=True)
     pokemon_id = Column(Integer, ForeignKey("pokemon.id"))
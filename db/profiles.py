@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Named relationship loading profiles for pokemon queries.
+
+Notes:
+    Every relationship on the mappers is lazy loaded by default, so walking a
+    pokemon's moves or locations issues a query per row. The profiles here
+    load what a given screen needs with a fixed number of queries:
+
+        display:   Entries and types, for the dex entry screen
+        evolution: Evolutions and pre-evolution with their species, triggers and items
+        full:      Every relationship used by Pokemon.__str__
+
+"""
+
+from typing import Dict, List, Optional
+from sqlalchemy.orm import joinedload, selectinload  # type: ignore
+import db.pokeschema as pokeschema  # type: ignore
+
+Pokemon = pokeschema.Pokemon
+Evolution = pokeschema.Evolution
+
+
+def evolution_options() -> List:
+    """Loader options for a pokemon's evolutions and pre-evolution."""
+    evos = selectinload(Pokemon.evos)
+    pre_evo = joinedload(Pokemon.pre_evo)
+    return [
+        evos.joinedload(Evolution.evo),
+        evos.joinedload(Evolution.trigger),
+        evos.joinedload(Evolution.item),
+        pre_evo.joinedload(Evolution.pre_evo),
+        pre_evo.joinedload(Evolution.trigger),
+        pre_evo.joinedload(Evolution.item),
+    ]
+
+
+PROFILES: Dict[str, List] = {
+    "display": [
+        selectinload(Pokemon.entries),
+        joinedload(Pokemon.type1),
+        joinedload(Pokemon.type2),
+    ],
+    "evolution": evolution_options(),
+    "full": [
+        joinedload(Pokemon.type1),
+        joinedload(Pokemon.type2),
+        joinedload(Pokemon.egg1),
+        joinedload(Pokemon.egg2),
+        selectinload(Pokemon.entries),
+        selectinload(Pokemon.moves).joinedload(pokeschema.Learns.move),
+        selectinload(Pokemon.moves).joinedload(pokeschema.Learns.method),
+        selectinload(Pokemon.locations).joinedload(pokeschema.PokemonObtain.location),
+        selectinload(Pokemon.locations).joinedload(pokeschema.PokemonObtain.method),
+        *evolution_options(),
+    ],
+}
+
+
+def query_pokemon(session, profile: str = "display"):
+    """Return a pokemon query with the loader options of a profile applied.
+
+    Args:
+        session: Database session to query
+        profile: Name of the loading profile to apply
+
+    Raises:
+        KeyError: Unknown profile name
+
+    """
+    return session.query(Pokemon).options(*PROFILES[profile])
+
+
+def get_pokemon(session, id: int, profile: str = "display") -> Optional[pokeschema.Pokemon]:
+    """Return a pokemon with the relationships of a profile already loaded.
+
+    Args:
+        session: Database session to query
+        id:      National dex id of the pokemon
+        profile: Name of the loading profile to apply
+
+    Returns:
+        The loaded pokemon, or None if no row has the id
+
+    """
+    return query_pokemon(session, profile).filter_by(id=id).one_or_none()
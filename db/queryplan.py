@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Check the standard lookups of the dex database are answered from an index.
+
+Run from the repository root, exiting non-zero if any lookup scans a table:
+
+    python -m db.queryplan
+    python -m db.queryplan --database sqlite:///poke.db
+
+Notes:
+    Each standard query is one of the lookups the relationships on the
+    mappers issue, keyed the way the lazy and selectin loaders key them. Its
+    SQLite query plan is read with EXPLAIN QUERY PLAN, and any step that scans
+    a table, or an index end to end, counts as a failure. Plans are read
+    from an empty copy of the schema, the declared one or that of a given
+    database, so the check does not depend on how much data is loaded.
+
+    Loading the snapshot reads every species on purpose, so it is not checked.
+    Indexes are only created with their tables, running python -m db.importer
+    against an existing database adds any that are missing.
+
+"""
+
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import create_engine, select  # type: ignore
+from sqlalchemy.engine import Engine  # type: ignore
+import db.pokeschema as pokeschema  # type: ignore
+import argparse
+import sys
+
+
+class PlanError(Exception):
+    """Raised when a standard lookup's query plan scans a whole table or index."""
+
+
+def standard_queries() -> Dict[str, object]:
+    """Return the lookup statements behind each relationship, by name."""
+    Evolution, Learns, PokemonObtain, ItemObtain = (
+        pokeschema.Evolution,
+        pokeschema.Learns,
+        pokeschema.PokemonObtain,
+        pokeschema.ItemObtain,
+    )
+    return {
+        "pokemon.by_id": select(pokeschema.Pokemon).where(pokeschema.Pokemon.id == 1),
+        "pokemon.entries": select(pokeschema.Entry).where(pokeschema.Entry.pokemon_id == 1),
+        "pokemon.moves": select(Learns).where(Learns.pokemon_id.in_([1, 2])),
+        "pokemon.locations": select(PokemonObtain).where(PokemonObtain.pokemon_id.in_([1, 2])),
+        "pokemon.evos": select(Evolution).where(Evolution.pre_evo_id.in_([1, 2])),
+        "pokemon.pre_evo": select(Evolution).where(Evolution.evo_id == 1),
+        "move.pokemon": select(Learns).where(Learns.move_id == 1),
+        "location.pokemon": select(PokemonObtain).where(PokemonObtain.location_id == 1),
+        "location.items": select(ItemObtain).where(ItemObtain.location_id == 1),
+        "item.locations": select(ItemObtain).where(ItemObtain.item_id == 1),
+        "move.learns_join": select(Learns, pokeschema.Move)
+        .join(pokeschema.Move, Learns.move_id == pokeschema.Move.id)
+        .where(Learns.pokemon_id == 1),
+    }
+
+
+def schema_engine(source: Optional[Engine] = None) -> Engine:
+    """Return an empty in-memory database with the dex schema, so plans do not depend on the data.
+
+    Args:
+        source: Database to copy the dex tables and indexes from, the declared schema if not given
+
+    Notes:
+        ANALYZE statistics are left behind, on a small database they rightly
+        make the planner prefer scanning a tiny table over its index.
+
+    """
+    engine = create_engine("sqlite://")
+    if source is None:
+        pokeschema.Base.metadata.create_all(engine)
+        return engine
+    with source.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT type, tbl_name, sql FROM sqlite_master WHERE sql IS NOT NULL AND type IN ('table', 'index')"
+        ).fetchall()
+    tables = pokeschema.Base.metadata.tables
+    with engine.begin() as connection:
+        for kind, table, sql in sorted(rows, key=lambda row: row[0] != "table"):
+            if table in tables:
+                connection.exec_driver_sql(sql)
+    return engine
+
+
+def explain(engine: Engine, statement) -> List[str]:
+    """Return the detail line of each step of a statement's query plan."""
+    sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as connection:
+        return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def full_scans(engine: Engine) -> List[Tuple[str, str]]:
+    """Find the standard queries whose plan scans a whole table or index.
+
+    Args:
+        engine: Engine of a SQLite database with the dex tables created, usually from schema_engine
+
+    Returns:
+        Query name and plan step of every scan, empty if every lookup uses an index
+
+    """
+    return [
+        (name, step)
+        for name, statement in standard_queries().items()
+        for step in explain(engine, statement)
+        if step.startswith("SCAN ")
+    ]
+
+
+def check_plans(engine: Optional[Engine] = None) -> None:
+    """Fail if any standard query scans a whole table or index, whatever data the database holds.
+
+    Args:
+        engine: Database whose tables and indexes are checked, the declared schema if not given
+
+    Raises:
+        PlanError: Listing every query plan step that scans
+
+    """
+    scans = full_scans(schema_engine(engine))
+    if scans:
+        raise PlanError("\n".join(f"Full scan in {name}: {step}" for name, step in scans))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the standard dex lookups are answered from an index.")
+    parser.add_argument("--database", help="database url whose indexes are checked, the declared schema by default")
+    args = parser.parse_args()
+
+    source = create_engine(args.database) if args.database else None
+    engine = schema_engine(source)
+    for name, statement in standard_queries().items():
+        print(f"{name}: {'; '.join(explain(engine, statement))}")
+    try:
+        check_plans(source)
+    except PlanError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
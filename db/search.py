@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Full-text search over dex entries, move descriptions and item descriptions.
+
+Run from the repository root:
+
+    python -m db.search fire --kind entry
+    python -m db.search para --prefix --kind move
+
+Notes:
+    Every searchable row is mirrored into a single FTS5 table, with the
+    species, move or item name and the text to search. Rowids are the source
+    row's id times the number of sources plus the source's code, so triggers
+    on the source tables update a mirrored row without scanning for it.
+
+    db.importer drops the triggers for a bulk load and rebuilds the index in
+    one pass afterwards. An entry's species name is copied when the entry is
+    written, renaming a species needs a rebuild to show in search results.
+
+    Queries are split into words that must all match, ranked by bm25 with
+    name matches weighted above text matches. Prefix mode also matches words
+    that start with the last word typed, for searching while typing.
+
+"""
+
+from typing import List, NamedTuple, Optional, Sequence
+from sqlalchemy import bindparam, create_engine, text  # type: ignore
+import argparse
+import re
+
+TABLE = "search"
+TOKENIZE = "unicode61 remove_diacritics 2"
+NAME_WEIGHT = 4.0
+TEXT_WEIGHT = 1.0
+WORD = re.compile(r"\w+")
+
+
+class Source(NamedTuple):
+    """A table mirrored into the search index."""
+
+    kind: str
+    code: int
+    table: str
+    ref: str
+    name: str
+    text: str
+
+
+SPECIES = "(SELECT species FROM pokemon WHERE pokemon.id = {row}.pokemon_id)"
+SOURCES = (
+    Source("entry", 0, "entries", "pokemon_id", SPECIES, "entry"),
+    Source("move", 1, "moves", "id", "{row}.name", "description"),
+    Source("item", 2, "items", "id", "{row}.name", "description"),
+)
+KINDS = tuple(source.kind for source in SOURCES)
+
+
+class Hit(NamedTuple):
+    """A search result.
+
+    Notes:
+        id is the species of an entry, or the id of a move or item.
+
+    """
+
+    kind: str
+    id: int
+    name: Optional[str]
+    snippet: str
+    rank: float
+
+
+def mirror(source: Source, row: str) -> str:
+    """Return the column values mirroring a source row, row naming the row in SQL such as new."""
+    return (
+        f"{row}.id * {len(SOURCES)} + {source.code}, '{source.kind}', {row}.{source.ref},"
+        f" {source.name.format(row=row)}, {row}.{source.text}"
+    )
+
+
+def trigger_statements(source: Source) -> List[str]:
+    """Return the statements creating the triggers keeping a source's mirrored rows in sync."""
+    columns = f"{TABLE}(rowid, kind, ref, name, text)"
+    insert = f"INSERT INTO {columns} VALUES ({mirror(source, 'new')});"
+    delete = f"DELETE FROM {TABLE} WHERE rowid = old.id * {len(SOURCES)} + {source.code};"
+    prefix = f"CREATE TRIGGER IF NOT EXISTS {TABLE}_{source.table}"
+    return [
+        f"{prefix}_insert AFTER INSERT ON {source.table} BEGIN {insert} END",
+        f"{prefix}_delete AFTER DELETE ON {source.table} BEGIN {delete} END",
+        f"{prefix}_update AFTER UPDATE ON {source.table} BEGIN {delete} {insert} END",
+    ]
+
+
+def drop_triggers(connection) -> None:
+    """Drop the sync triggers, so a bulk load does not update the index row by row."""
+    for source in SOURCES:
+        for event in ("insert", "delete", "update"):
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {TABLE}_{source.table}_{event}")
+
+
+def create_index(connection) -> None:
+    """Create the search table if missing, fill it from the source tables and create the sync triggers.
+
+    Args:
+        connection: Writable connection to a SQLite database with the dex tables created
+
+    """
+    connection.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        f"kind UNINDEXED, ref UNINDEXED, name, text, tokenize = '{TOKENIZE}', prefix = '2 3')"
+    )
+    connection.exec_driver_sql(f"DELETE FROM {TABLE}")
+    for source in SOURCES:
+        connection.exec_driver_sql(
+            f"INSERT INTO {TABLE}(rowid, kind, ref, name, text)"
+            f" SELECT {mirror(source, source.table)} FROM {source.table} WHERE {source.table}.{source.text} IS NOT NULL"
+        )
+        for statement in trigger_statements(source):
+            connection.exec_driver_sql(statement)
+    connection.exec_driver_sql(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+
+
+def match_expression(query: str, prefix: bool = False) -> str:
+    """Build an FTS5 match expression requiring every word of a query.
+
+    Args:
+        query:  Words typed by the user, punctuation is ignored
+        prefix: Also match words starting with the last word
+
+    Returns:
+        The match expression, empty if the query has no words
+
+    """
+    words = [f'"{word}"' for word in WORD.findall(query)]
+    if prefix and words:
+        words[-1] += "*"
+    return " ".join(words)
+
+
+def search(connection, query: str, kinds: Sequence[str] = KINDS, limit: int = 20, prefix: bool = False) -> List[Hit]:
+    """Find the best matches for a query.
+
+    Args:
+        connection: Connection or session of a database with the search index created
+        query:      Words to search for
+        kinds:      Kinds of row to return, any of entry, move and item
+        limit:      Most hits to return
+        prefix:     Treat the last word as the start of a word, for searching while typing
+
+    Returns:
+        Hits ordered best first
+
+    Raises:
+        ValueError: A kind is not entry, move or item
+
+    """
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown search kinds {', '.join(sorted(unknown))}, expected any of {', '.join(KINDS)}")
+    expression = match_expression(query, prefix)
+    if not expression or not kinds:
+        return []
+    statement = text(
+        f"SELECT kind, ref, name, snippet({TABLE}, 3, '[', ']', '...', 12),"
+        f" bm25({TABLE}, 0, 0, {NAME_WEIGHT}, {TEXT_WEIGHT}) AS rank"
+        f" FROM {TABLE} WHERE {TABLE} MATCH :expression AND kind IN :kinds ORDER BY rank LIMIT :limit"
+    ).bindparams(bindparam("kinds", expanding=True))
+    rows = connection.execute(statement, {"expression": expression, "kinds": list(kinds), "limit": limit})
+    return [Hit(*row) for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search dex entries, moves and items.")
+    parser.add_argument("query", nargs="*", help="words to search for")
+    parser.add_argument("--kind", action="append", choices=KINDS, help="kind of result to return, repeatable")
+    parser.add_argument("--prefix", action="store_true", help="match words starting with the last word")
+    parser.add_argument("--limit", type=int, default=20, help="most results to show")
+    parser.add_argument("--database", default="sqlite:///poke.db", help="database url")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the search index before searching")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        with create_engine(args.database).begin() as connection:
+            create_index(connection)
+    if args.query:
+        from db.database import open_database  # type: ignore
+
+        with open_database(args.database).engine.connect() as connection:
+            for hit in search(connection, " ".join(args.query), args.kind or KINDS, args.limit, args.prefix):
+                print(f"{hit.kind:5} {hit.id:4} {hit.name or '':16} {hit.snippet}")
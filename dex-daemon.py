@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Run the dex render service, answering render requests without restarting.
+
+Notes:
+    Requests are read from stdin by default, or from clients of a unix socket
+    when --socket is given. See dex.service for the request format.
+
+"""
+
+from dex.render import setup_logging
+from dex.service import RenderService
+import dex.trace as trace
+import argparse
+import sys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", help="unix socket path to listen on instead of stdin")
+    parser.add_argument("--font", default="assets/ui/gscfont.png", help="font sheet to render with")
+    parser.add_argument("--database", default="sqlite:///poke.db", help="database url")
+    parser.add_argument("--output", default="last_display.png", help="preview png written after each render")
+    parser.add_argument("--colour", default="yellow", help="inky display colour variant")
+    parser.add_argument("--no-snapshot", action="store_true", help="query the database on every render")
+    parser.add_argument("--preload", action="store_true", help="decode every sprite sheet at startup")
+    parser.add_argument("--bundle", help="asset bundle built by dex.bundle to read assets from")
+    parser.add_argument("--large-font", help="larger font sheet preferred for entries short enough to fit it")
+    parser.add_argument("--screen", default="phat", help="screen layout from config/screens.ini")
+    parser.add_argument("--displays", metavar="FILE", help="drive every panel in a displays config file")
+    parser.add_argument("--trace", metavar="FILE", help="log stage timings and write a Chrome trace to FILE")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.trace:
+        trace.tracer.enable(args.trace)
+    service = RenderService(
+        args.font,
+        args.database,
+        args.output,
+        args.colour,
+        snapshot=not args.no_snapshot,
+        preload=args.preload,
+        bundle=args.bundle,
+        large_font=args.large_font,
+        screen=args.screen,
+        displays=args.displays,
+    )
+    if args.socket:
+        service.serve_socket(args.socket)
+    else:
+        service.serve_stream(sys.stdin, sys.stdout)
+    service.close()
+    trace.tracer.disable()
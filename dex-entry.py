@@ -3,389 +3,207 @@
 
 """Display the dex entry for a given pokemon on an inky display.
 
+Notes:
+    Modules are imported by the code path that needs them, so rendering from
+    a snapshot file never imports SQLAlchemy and --no-display never imports
+    inky. --startup reports how long each phase of the run took and which
+    heavy modules were loaded, for per-module detail run with
+    python -X importtime dex-entry.py.
+
+    An entry too long for one frame is displayed from its first page, and
+    every later page is saved as a numbered preview next to --output.
+
 Todo:
     Implement clean dex display for PHAT and WHAT displays.
-    Implement command line arguments to use as an individual script.
     Port remaining code necessary from display-test.
     The textual output to the display probably needs to be refactored to account for more variables
         - in progress
-    Formatter class or module for building pasteable strings, floats?
 
 """
 
-from typing import List, Tuple
-from PIL import Image, ImageDraw  # type: ignore
-from PIL.ImagePalette import ImagePalette  # type: ignore
-from dex.font import Font
-from dex.poke import Pokemon
-import dex.util as util
-import logging
-import logging.config
-import os
-import random
-
-
-def gsc_format(entry: str) -> str:
-    """Replace character patterns with unique characters to work with gscfont.
-
-    Args:
-        entry: The entry to be formatted
-
-    Returns:
-        A string with character replacements performed
-
-    Notes:
-        The gscfont file contains special characters that exist as one of the following:
-            Combination character with apostrophe and character sharing same char slot
-            Symbol
-            Combined letters for special use
-
-        If using gscfont this replacement process should be done before wrapping the entry
-
-    Todo:
-        There may be a better way to handle this than using special characters, look in to it
-        Notate somewhere which special characters are used for what character on the sheet
-        Clean up replacements
-
-    """
-    partial = entry.replace("'d", "ⓓ").replace("'l", "ⓛ").replace("'m", "ⓜ").replace("'r", "ⓡ")
-    finished = partial.replace("'s", "ⓢ").replace("'t", "ⓣ").replace("'v", "ⓥ")
-    return finished
-
-
-def entry_wrap(entry: str, line_length: int = 17, line_count: int = 7) -> List[str]:
-    """Split an entry into separate lines to account for text wrap.
+import time
 
-    Args:
-        entry:       The entry to be wrapped
-        line_length: The maximum length of each line for display
-                     Defaults to 17, the maximum on a PHAT using the gscfont
-        line_count:  The maximum number of lines for display
-                     Defaults to 7, the maximum on a PHAT using the gscfont
-
-    Returns:
-        A list of strings, one for each line to be displayed
-
-    Raises:
-        DexError: Entry too long to be displayed on one screen given restrictions
-
-    Notes:
-        It may be better to find a way to shrink the text to fit longer entries.
-        Until that decision is made an error will be raised if the entry won't fit.
+started = time.perf_counter()
 
-    Todo:
-        This can probably be written cleaner, look in to it
+from typing import List, Tuple  # noqa: E402
+import argparse  # noqa: E402
+import os  # noqa: E402
+import random  # noqa: E402
+import sys  # noqa: E402
 
-    """
-    words = entry.split(" ")
-    line_index = 0
-    line_strings = [""] * line_count
-
-    for i in range(len(words)):
-        if (
-            (len(line_strings[line_index]) == line_length - 2 and len(words[i]) > 2)
-            or (len(line_strings[line_index]) == line_length - 1 and len(words[i]) > 1)
-            or (len(line_strings[line_index]) == line_length)
-        ):
-            line_index += 1
-        if len(line_strings[line_index]) + len(words[i]) <= line_length:
-            line_strings[line_index] += words[i]
-            if len(line_strings[line_index]) < line_length:
-                line_strings[line_index] += " "
-        else:
-            wrap_index = line_length - len(line_strings[line_index]) - 1
-            line_strings[line_index] += words[i][:wrap_index] + "-"
-            line_index += 1
-            line_strings[line_index] += words[i][wrap_index:] + " "
-    return line_strings
-
-
-def create_mask(source: Image, mask: Tuple[int, int, int] = (0, 1, 2)) -> Image:
-    """Create an image mask for pasting purposes.
-
-    Args:
-        source: Image to create the mask from
-        mask:   Tuple containing colormap indices to be masked
+HEAVY_MODULES = ("PIL", "png", "sqlalchemy", "inky", "multiprocessing")
+DEFAULT_ID = 129
 
-                Default values are equivalent to white, black, and red
-                for an inky display
 
-    Returns:
-        An image mask for the source image
+class Startup:
+    """Time spent in each phase of a run, reported with --startup.
 
-    Attribution:
-        This method was written by the folks at pimoroni, and can be found within
-        their examples for their inky displays.
+    Attributes:
+        phases (list of str/float pairs): Phase names and their durations in seconds
 
     """
-    mask_image = Image.new("1", source.size)
-    w, h = source.size
-    for x in range(w):
-        for y in range(h):
-            p = source.getpixel((x, y))
-            if p in mask:
-                mask_image.putpixel((x, y), 255)
-    return mask_image
 
-
-def display_char(img: Image, font: Font, location: Tuple[int, int], character: str) -> None:
-    """Paste a single character from a fontsheet to the display image.
+    def __init__(self, start: float):
+        """Start timing from a perf_counter reading.
+
+        Args:
+            start: perf_counter reading taken before the script's imports
+
+        """
+        self.start = start
+        self.last = start
+        self.phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        """End the current phase under the given name."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self) -> str:
+        """Return the phase timings and the heavy modules that were imported."""
+        phases = ", ".join(f"{phase} {duration * 1000:.1f}ms" for phase, duration in self.phases)
+        loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+        skipped = [module for module in HEAVY_MODULES if module not in sys.modules]
+        return (
+            f"startup: {phases}, total {(self.last - self.start) * 1000:.1f}ms\n"
+            f"imported: {', '.join(loaded) or 'none'}; not imported: {', '.join(skipped) or 'none'}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description="Display the dex entry for a given pokemon.")
+    parser.add_argument(
+        "id", nargs="?", type=int, help=f"national dex id to display, {DEFAULT_ID} or with --frames any cached species"
+    )
+    parser.add_argument("--font", default="assets/ui/gscfont.png", help="font sheet to render with")
+    parser.add_argument("--large-font", help="larger font sheet preferred for entries short enough to fit it")
+    parser.add_argument("--bundle", help="asset bundle built by dex.bundle to read the fonts and sprites from")
+    parser.add_argument("--screen", default="phat", help="screen layout from config/screens.ini")
+    parser.add_argument("--output", default="last_display.png", help="preview png written after rendering")
+    parser.add_argument("--no-display", action="store_true", help="only write the preview png, never load inky")
+    parser.add_argument("--database", default="sqlite:///poke.db", help="database url")
+    parser.add_argument("--snapshot", metavar="FILE", help="read species data from a snapshot file, not the database")
+    parser.add_argument("--dump-snapshot", metavar="FILE", help="write the database to a snapshot file and exit")
+    parser.add_argument("--batch", metavar="DIR", help="pre-render every frame into a frame cache directory")
+    parser.add_argument("--processes", type=int, help="worker processes for --batch, one per core by default")
+    parser.add_argument("--frames", metavar="DIR", help="display a cached frame instead of rendering")
+    parser.add_argument("--trace", metavar="FILE", help="log stage timings and write a Chrome trace to FILE")
+    parser.add_argument("--startup", action="store_true", help="report phase timings and heavy imports on stderr")
+    return parser.parse_args()
+
+
+def open_session(database: str):
+    """Return a session on the shared read-only database, importing SQLAlchemy only when called.
 
     Args:
-        img:         The display image to be pasted into
-        font:        The font class in use
-        location:    (x, y) location tuple to paste character
-        character:   Character to be pasted
-
-    Notes:
-        X and Y coordinates are anchored to the top left pixel of the character,
-        and 0,0 is the top left of the display
+        database: SQLAlchemy database url
 
     """
-    # sheet = font.sheetstring
-    # (
-    #     "ABCDEFGHIJKLMNOPQRSTUVWXYZ():;[]abcdefghijklmnopqrstuvwxyz      "
-    #     "ÄÖÜäöü          ⓓⓛⓜⓡⓢⓣⓥ       ⓃⓄ'①②-  ?!.&é ▷▶▼♂$×./,♀0123456789"
-    # )
-    # sheet_x = (sheet.index(character) % font.sheetwidth) * font.charwidth
-    # sheet_y = (int(sheet.index(character) / font.sheetwidth)) * font.charheight
+    from db.database import get_session  # type: ignore
 
-    # char_sprite = font.crop((sheet_x, sheet_y, sheet_x + char_width, sheet_y + char_height))
-    char_sprite = font.get_character(character)
-    img.paste(char_sprite, location, create_mask(char_sprite))
+    return get_session(database)
 
 
-def display_line(img: Image, font: Font, location: Tuple[int, int], line: str) -> None:
-    """Paste an entire line into a display image using characters from a fontsheet.
+def load_snapshot(args: argparse.Namespace):
+    """Return every species, from the snapshot file if given, otherwise from the database."""
+    from dex.poke import DexSnapshot
 
-    Args:
-        img:         The display image to be pasted into
-        font:        The font class
-        location:    (x, y) location tuple to paste character
-        line:        Line to be pasted
+    if args.snapshot:
+        return DexSnapshot.read(args.snapshot)
+    return DexSnapshot.load(open_session(args.database))
 
-    Notes:
-        X and Y coordinates are anchored to the top left pixel of the
-        first character of the line, 0,0 is the top left of the display
 
-    """
-    for character, index in zip(line, range(len(line))):
-        display_char(img, font, (location[0] + font.charwidth * index, location[1]), character)
+def page_filename(output: str, page: int) -> str:
+    """Return the preview filename of a later page of the entry, numbered from 1 like last_display-2.png."""
+    stem, ext = os.path.splitext(output)
+    return f"{stem}-{page + 1}{ext}"
 
 
-def display_lines(img: Image, font: Font, location: Tuple[int, int], lines: List[str], line_gap: int = 4) -> None:
-    """Paste multiple lines into a display image using characters from a fontsheet.
+def open_display(args: argparse.Namespace, screen):
+    """Return the inky display, None with --no-display or without inky, and a blank frame for it."""
+    if args.no_display:
+        from PIL import Image  # type: ignore
 
-    Args:
-        img:         The display image to be pasted into
-        font:        The font class
-        location:    (x, y) location tuple to paste character
-        lines:       List of lines to be pasted
-        line_gap:    Distance in pixels to separate each line
-
-    Notes:
-        X and Y coordinates are anchored to the top left pixel of the first
-        character of the first line, 0,0 is the top left of the display.
+        return None, Image.new("P", screen.size)
+    from dex.render import init_display
 
-        The lines are left aligned to the X coordinate
-
-    """
-    for line, index in zip(lines, range(len(lines))):
-        display_line(img, font, (location[0], location[1] + index * (font.charheight + line_gap)), line)
-
-
-def display_sprite(img: Image, location: Tuple[int, int], mon: Pokemon) -> None:
-    """Paste sprite and bounding box into display image.
-
-    Args:
-        img:      The display image to be pasted into
-        location: (x, y) location tuple to paste character
-        id:       Id of the pokemon sprite to paste
-        gen:      Generation to pull sprite from
-        ver:      Version within generation to pull sprite from
-        form:     Choose form if pokemon has more than one
-
-    Notes:
-        X and Y coordinates are anchored to the top left of the bounding box
-        for the sprite, 0,0 is the top left of the display.
-
-    Todo:
-        Sprites are currently stored using sprites from gen 2, but without
-        an indicator by filename to indicate generation. I think the best
-        solution may be to make each sprite file a full sheet, with gen 1 left
-        aligned. This will require shifting all of the sprites over 56 pixels
-        as they are gen 2, but it would help expansion in the future if done now.
-
-    """
-    box = Image.open("assets/ui/spritebox.png")
-    sprite_sheet = Image.open("assets/sprites/{:03d}.png".format(id))
-
-    # TODO: Put this next line in a try/except or get index errors for high gens
-    # sprite = sprite_sheet.crop((0, 56 * ver, 56, 56 + 56 * ver))
-    sprite = random.choice(mon.sprites)
-
-    img.paste(box, location, create_mask(box))
-    img.paste(sprite, tuple(n + 6 for n in location), create_mask(sprite))
-
-
-def display_footprint(img: Image, location: Tuple[int, int], mon: Pokemon) -> None:
-    """Paste footprint sprite into display image.
-
-    Args:
-        img:      The display image to be pasted into
-        location: (x, y) location tuple to paste character
-        id:       Id of the pokemon footprint to paste
-
-    Notes:
-        X and Y coordinates are anchored to the top left of the footprint
-        sprite area, 0,0 is the top left of the display.
-
-    """
-    img.paste(mon.footprint, location, create_mask(mon.footprint))
-
-
-def display_numeric(img: Image.Image, font: Font, location: Tuple[int, int], width: int, mon: Pokemon) -> None:
-    """Paste numeric data into display image.
-
-    Args:
-        img:      Display image to be pasted into
-        font:     Fontsheet image
-        location: (x, y) location tuple to paste character
-        width:    How wide the section should be
-        data:     Numeric data to be pasted
-                  Tuple with data in the following order:
-                    ID
-                    Height
-                    Weight
-
-    Notes:
-        X and Y coordinates are the top left of the ID line for numeric data
-        0,0 is the top left of the display
-        Too many digits in height or weight for given width may cause issues
-
-    """
-    # setup for final numeric data image
-    underline = 2
-    line_gap = 4
-    height = 3 * font.charwidth + 2 * line_gap + 1
-    final = Image.new("P", (width, height))
-    draw = ImageDraw.Draw(final)
-
-    x = 0
-    y = 0
-
-    # ID section
-    temp = font.get_string("ⓃⓄ")
-    final.paste(temp, (x, y), util.create_mask(temp))
-    x = width - 3 * font.charwidth
-    temp = font.get_numeral(mon.id)
-    final.paste(temp, (x, y), util.create_mask(temp))
-    x = 0
-    y += font.charheight
-    draw.line((x, y, width, y), underline)
-
-    # Height section
-    y += line_gap
-    temp = font.get_string("HT")
-    final.paste(temp, (x, y), util.create_mask(temp))
-    temp = font.get_numeral(mon.height, suffix="m")
-    x = width - temp.width
-    final.paste(temp, (x, y), util.create_mask(temp))
-    x = 0
-    y += font.charheight
-    draw.line((x, y, width, y), underline)
-
-    # Weight section
-    y += line_gap
-    temp = font.get_string("WT")
-    final.paste(temp, (x, y), util.create_mask(temp))
-    temp = font.get_numeral(mon.weight, suffix="kg")
-    x = width - temp.width
-    final.paste(temp, (x, y), util.create_mask(temp))
-    y += font.charheight
-    draw.line((0, y, width, y), underline)
-
-    img.paste(final, location, util.create_mask(final))
-
-
-def display_taxonomy(img: Image.Image, font: Font, location: Tuple[int, int], width: int, mon: Pokemon) -> None:
-    """Paste taxonomic information into display image.
-
-    Args:
-        img: Display image to paste into
-
-    """
-    underline = 2
-    line_gap = 3
-    height = 2 * font.charheight + 2 * line_gap
-    final = Image.new("P", (width, height))
-    draw = ImageDraw.Draw(final)
-
-    x = 0
-    y = 0
-
-    # Species
-    temp = font.get_string(mon.species.upper())
-    final.paste(temp, (x, y), util.create_mask(temp))
-    y += font.charheight
-    draw.line((0, y, width, y), underline)
-
-    # Classification
-    y += line_gap
-    temp = font.get_string(mon.classification.upper())
-    final.paste(temp, (x, y), util.create_mask(temp))
-    x += font.charwidth * len(mon.classification)
-    temp = font.get_string("①②")
-    final.paste(temp, (x, y), util.create_mask(temp))
-    y += font.charheight
-    draw.line((0, y, width, y), underline)
-
-    img.paste(final, location, util.create_mask(final))
+    return init_display(screen=screen)
 
 
 if __name__ == "__main__":
-    try:
-        os.mkdir("logs")
-    except FileExistsError:
-        dir_created = False
-    else:
-        dir_created = True
-    finally:
-        logging.config.fileConfig("config/logging.ini")
-        logger = logging.getLogger(__name__)
-        if dir_created:
-            logger.info("Logs folder was not present, was created")
-    try:
-        from inky import InkyPHAT  # type: ignore
-    except (ModuleNotFoundError, RuntimeError) as e:
-        logger.debug(f"Error initializing inky library: {e}")
-        img = Image.new("P", (212, 104))
-        en_inky = False
+    startup = Startup(started)
+    args = parse_args()
+
+    from dex.render import output_frame, render_frame, setup_logging
+    from dex.screen import load_screen
+    import dex.trace as trace
+
+    startup.mark("imports")
+    logger = setup_logging()
+    if args.trace:
+        trace.tracer.enable(args.trace)
+    screen = load_screen(args.screen)
+    startup.mark("setup")
+
+    if args.dump_snapshot:
+        load_snapshot(args).dump(args.dump_snapshot)
+        startup.mark("snapshot")
+    elif args.batch:
+        from dex.frames import render_all
+
+        render_all(load_snapshot(args), args.batch, args.font, args.large_font, args.processes, screen=screen)
+        startup.mark("batch")
+    elif args.frames:
+        from dex.frames import FrameCache
+
+        inky_display, _ = open_display(args, screen)
+        frame = FrameCache(args.frames).random_frame(args.id)
+        startup.mark("load")
+        output_frame(frame, inky_display, args.output)
+        startup.mark("output")
     else:
-        en_inky = True
-        inky_display = InkyPHAT("yellow")
-        inky_display.set_border(inky_display.BLACK)
-        img = Image.new("P", (inky_display.WIDTH, inky_display.HEIGHT))
-
-    id = 129
-
-    mon = Pokemon(id)
-
-    # entry = get_entry(id, 2, 0)
-    # data = get_data(id)
-    font = Font("assets/ui/gscfont.png")
-
-    display_sprite(img, (1, 1), mon)
-    display_numeric(img, font, (2, 69), 67, mon)
-    display_lines(img, font, (71, 23), entry_wrap(random.choice(mon.entries)))
-    display_taxonomy(img, font, (71, 1), 122, mon)
-    display_footprint(img, (195, 1), mon)
-
-    img = img.rotate(180)
-    if en_inky:
-        inky_display.set_image(img)
-        inky_display.show()
-    palette = ImagePalette(palette=[255, 255, 255, 0, 0, 0, 255, 0, 0], size=9)
-    img.putpalette(palette.tostring())
-    img = img.rotate(180)
-    img.save("last_display.png")
+        from dex.font import Font
+        from dex.poke import Pokemon
+        import dex.assets as assets
+
+        if args.id is None:
+            args.id = DEFAULT_ID
+        inky_display, img = open_display(args, screen)
+        startup.mark("display")
+        bundle = None
+        if args.bundle:
+            from dex.bundle import Bundle
+
+            bundle = Bundle(args.bundle)
+        pool = assets.pool if bundle is None else assets.AssetPool(bundle=bundle)
+        font = Font(args.font, bundle=bundle)
+        entry_fonts = (Font(args.large_font, bundle=bundle), font) if args.large_font else None
+        startup.mark("fonts")
+
+        with trace.frame("render", id=args.id):
+            if args.snapshot:
+                mon = Pokemon(args.id, snapshot=load_snapshot(args), pool=pool)
+            else:
+                mon = Pokemon(args.id, open_session(args.database), pool=pool)
+            startup.mark("data")
+            entry = random.choice(mon.entries)
+            variant = random.randrange(len(mon.sprites))
+            pages = render_frame(img, font, mon, entry, pool, entry_fonts, variant=variant, screen=screen)
+            startup.mark("render")
+            output_frame(img, inky_display, args.output)
+            startup.mark("output")
+            for page in range(1, pages):
+                img = img.copy()
+                img.paste(0, (0, 0) + img.size)
+                render_frame(img, font, mon, entry, pool, entry_fonts, page, variant, screen)
+                filename = page_filename(args.output, page)
+                output_frame(img, None, filename)
+                logger.info(f"Entry for {args.id} continues on page {page + 1} of {pages}, preview saved to {filename}")
+            if pages > 1:
+                startup.mark("pages")
+    trace.tracer.disable()
+
+    if args.startup:
+        print(startup.report(), file=sys.stderr)
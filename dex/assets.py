@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Decode sprite sheets and UI pieces once and share them across renders."""
+
+from collections import OrderedDict
+from PIL import Image  # type: ignore
+from typing import Dict, List, NamedTuple, Tuple
+import dex.trace as trace
+import dex.util as util
+import glob
+import logging
+import os
+
+SPRITE_FRAMES = ((0, 0, 56, 56), (0, 56, 56, 112))
+FOOTPRINT_FRAME = (0, 112, 16, 128)
+
+
+class Asset(NamedTuple):
+    """Decoded image with its paste mask."""
+
+    image: Image.Image
+    mask: Image.Image
+
+
+class SpriteSet(NamedTuple):
+    """Frames and footprint cropped from a single sprite sheet."""
+
+    sprites: Tuple[Asset, ...]
+    footprint: Asset
+
+
+def make_asset(image: Image.Image) -> Asset:
+    """Pair an image with its paste mask."""
+    return Asset(image, util.alpha_plane(image))
+
+
+def scale_asset(asset: Asset, factor: int) -> Asset:
+    """Upscale an image and its paste mask by an integer factor."""
+    return Asset(util.scale_image(asset.image, factor), util.scale_image(asset.mask, factor))
+
+
+class AssetPool:
+    """Least recently used pool of decoded sprite sheets and UI pieces.
+
+    Attributes:
+        directory (str): Assets directory containing sprites and ui folders
+        maxsize (int): Maximum number of sprite sheets kept, UI pieces are always kept
+        bundle (Bundle): Asset bundle to read from instead of png files, None to decode files
+        scale (int): Integer factor assets are upscaled by
+        source (AssetPool): Unscaled pool a scaled pool upscales assets from, None for an unscaled pool
+
+    """
+
+    def __init__(self, directory: str = "assets", maxsize: int = 64, bundle=None, scale: int = 1, source=None):
+        """Initialize an empty pool.
+
+        Args:
+            directory: Assets directory containing sprites and ui folders
+            maxsize:   Maximum number of sprite sheets kept
+            bundle:    Asset bundle to read from instead of png files
+            scale:     Integer factor assets are upscaled by
+            source:    Unscaled pool to upscale assets from, use scaled() rather than passing this
+
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.maxsize = maxsize
+        self.bundle = bundle
+        self.scale = scale
+        self.source = source
+        self.scaled_pools: Dict[int, "AssetPool"] = {}
+        self.sprite_sets: "OrderedDict[int, SpriteSet]" = OrderedDict()
+        self.ui_pieces: Dict[str, Asset] = {}
+
+    def open(self, path: str) -> Image.Image:
+        """Decode an image file fully and release its file handle.
+
+        Args:
+            path: Path to the image, relative to the assets directory
+
+        """
+        with Image.open(os.path.join(self.directory, path)) as image:
+            image.load()
+            return image.copy()
+
+    def ui(self, name: str) -> Asset:
+        """Return a UI piece by name, such as 'spritebox'.
+
+        Args:
+            name: Filename of the piece in the ui folder, without extension
+
+        """
+        try:
+            return self.ui_pieces[name]
+        except KeyError:
+            pass
+
+        with trace.span("asset.ui", name=name, scale=self.scale):
+            if self.source is not None:
+                asset = scale_asset(self.source.ui(name), self.scale)
+            elif self.bundle is not None:
+                asset = self.bundle.asset(f"ui/{name}")
+            else:
+                asset = make_asset(self.open(f"ui/{name}.png"))
+        self.ui_pieces[name] = asset
+        return asset
+
+    def sprite_set(self, id: int) -> SpriteSet:
+        """Return the sprite frames and footprint of a pokemon.
+
+        Args:
+            id: National dex id of the pokemon
+
+        """
+        try:
+            self.sprite_sets.move_to_end(id)
+            return self.sprite_sets[id]
+        except KeyError:
+            pass
+
+        with trace.span("asset.sprite_set", id=id, scale=self.scale):
+            if self.source is not None:
+                source = self.source.sprite_set(id)
+                sprite_set = SpriteSet(
+                    tuple(scale_asset(sprite, self.scale) for sprite in source.sprites),
+                    scale_asset(source.footprint, self.scale),
+                )
+            elif self.bundle is not None:
+                sprite_set = SpriteSet(
+                    tuple(self.bundle.asset(f"sprites/{id:03d}/{index}") for index in range(len(SPRITE_FRAMES))),
+                    self.bundle.asset(f"sprites/{id:03d}/footprint"),
+                )
+            else:
+                sheet = self.open(f"sprites/{id:03d}.png")
+                sprite_set = SpriteSet(
+                    tuple(make_asset(sheet.crop(frame)) for frame in SPRITE_FRAMES),
+                    make_asset(sheet.crop(FOOTPRINT_FRAME)),
+                )
+
+        self.sprite_sets[id] = sprite_set
+        if len(self.sprite_sets) > self.maxsize:
+            self.sprite_sets.popitem(last=False)
+        return sprite_set
+
+    def scaled(self, factor: int) -> "AssetPool":
+        """Return a pool serving this pool's assets upscaled by an integer factor.
+
+        Args:
+            factor: Whole number to multiply asset sizes by
+
+        Notes:
+            Scaled pools are kept per factor and upscale each asset once, with
+            nearest neighbour sampling so palette indices and masks stay exact.
+
+        """
+        if factor == 1:
+            return self
+        if self.source is not None:
+            return self.source.scaled(self.scale * factor)
+        try:
+            return self.scaled_pools[factor]
+        except KeyError:
+            pool = AssetPool(self.directory, self.maxsize, self.bundle, factor, self)
+            self.scaled_pools[factor] = pool
+            return pool
+
+    def sprite_ids(self) -> List[int]:
+        """Return the national dex ids that have a sprite sheet."""
+        if self.bundle is not None:
+            names = [name.split("/")[1] for name in self.bundle.records if name.startswith("sprites/")]
+        else:
+            paths = glob.glob(os.path.join(self.directory, "sprites", "*.png"))
+            names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+        return sorted({int(name) for name in names})
+
+    def preload(self) -> None:
+        """Decode every sprite sheet and UI piece, growing the pool to fit them all."""
+        ids = self.sprite_ids()
+        self.maxsize = max(self.maxsize, len(ids))
+        for id in ids:
+            self.sprite_set(id)
+        for piece in ("spritebox",):
+            self.ui(piece)
+        self.logger.debug(f"Preloaded {len(self.sprite_sets)} sprite sheets")
+
+    def clear(self) -> None:
+        """Drop every decoded asset."""
+        self.sprite_sets.clear()
+        self.ui_pieces.clear()
+        for pool in self.scaled_pools.values():
+            pool.clear()
+
+    def __repr__(self) -> str:
+        return f"AssetPool(directory='{self.directory}', maxsize={self.maxsize}, scale={self.scale})"
+
+
+pool = AssetPool()
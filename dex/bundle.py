@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Pack decoded assets into a single memory mapped bundle file.
+
+Notes:
+    All integers are little endian. The file starts with a fixed header
+
+        magic (4s) "DEXB", version (H), reserved (H), entry count (I)
+
+    followed by one fixed size record per entry
+
+        name (32s), width (H), height (H),
+        pixel offset (I), mask offset (I), palette offset (I),
+        info offset (I), info length (I)
+
+    Pixels are raw palette indices, one byte per pixel, and masks are one
+    byte per pixel planes of 0 or 255. Palettes are 768 bytes of RGB triplets.
+    Info is a JSON object of text metadata such as font sheet chunks, and has
+    zero length when an entry has none.
+
+    Entries are named after their asset, e.g. "ui/spritebox", "ui/gscfont",
+    "sprites/129/0" and "sprites/129/footprint".
+
+"""
+
+from PIL import Image  # type: ignore
+from typing import Dict, Iterator, NamedTuple, Tuple
+import dex.assets as assets
+import glob
+import json
+import mmap
+import os
+import struct
+
+MAGIC = b"DEXB"
+VERSION = 1
+HEADER = struct.Struct("<4sHHI")
+NAME_SIZE = 32
+RECORD = struct.Struct(f"<{NAME_SIZE}sHHIIIII")
+PALETTE_SIZE = 768
+
+
+class BundleError(Exception):
+    """Raised when a bundle file is missing entries or is not a bundle, or an asset name is too long to store."""
+
+
+class Record(NamedTuple):
+    """Location of a single entry within a bundle."""
+
+    width: int
+    height: int
+    pixels: int
+    mask: int
+    palette: int
+    info: int
+    info_length: int
+
+
+def font_info(image: Image.Image) -> Dict[str, str]:
+    """Collect the font sheet text chunks of an image, empty if it is not a font."""
+    return {key: value for key, value in image.info.items() if key.isupper() and isinstance(value, str)}
+
+
+def collect(directory: str = "assets") -> Iterator[Tuple[str, Image.Image, Image.Image, Dict[str, str]]]:
+    """Yield every bundled asset as (name, image, mask, info).
+
+    Args:
+        directory: Assets directory containing sprites and ui folders
+
+    """
+    pool = assets.AssetPool(directory)
+    for path in sorted(glob.glob(os.path.join(directory, "ui", "*.png"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        with Image.open(path) as image:
+            info = font_info(image)
+        asset = pool.ui(name)
+        yield f"ui/{name}", asset.image, asset.mask, info
+    for path in sorted(glob.glob(os.path.join(directory, "sprites", "*.png"))):
+        id = int(os.path.splitext(os.path.basename(path))[0])
+        sprite_set = pool.sprite_set(id)
+        for index, sprite in enumerate(sprite_set.sprites):
+            yield f"sprites/{id:03d}/{index}", sprite.image, sprite.mask, {}
+        yield f"sprites/{id:03d}/footprint", sprite_set.footprint.image, sprite_set.footprint.mask, {}
+
+
+def build(directory: str = "assets", output: str = "assets.bundle") -> int:
+    """Write every asset under a directory to a bundle file.
+
+    Args:
+        directory: Assets directory containing sprites and ui folders
+        output:    Path of the bundle file to write
+
+    Returns:
+        Number of entries written
+
+    Raises:
+        BundleError: An asset path is longer than the 32 bytes a record holds
+
+    """
+    entries = list(collect(directory))
+    offset = HEADER.size + RECORD.size * len(entries)
+    records = []
+    blobs = []
+    for name, image, mask, info in entries:
+        if len(name.encode()) > NAME_SIZE:
+            raise BundleError(f"Asset name '{name}' is longer than the {NAME_SIZE} bytes a bundle record holds")
+        pixels = image.tobytes()
+        plane = mask.convert("L").tobytes()
+        palette = bytes(image.getpalette() or [])[:PALETTE_SIZE].ljust(PALETTE_SIZE, b"\x00")
+        text = json.dumps(info).encode() if info else b""
+        record = Record(image.width, image.height, offset, 0, 0, 0, len(text))
+        record = record._replace(mask=record.pixels + len(pixels))
+        record = record._replace(palette=record.mask + len(plane))
+        record = record._replace(info=record.palette + PALETTE_SIZE)
+        offset = record.info + len(text)
+        records.append(RECORD.pack(name.encode(), *record))
+        blobs.extend((pixels, plane, palette, text))
+
+    temp = output + ".tmp"
+    with open(temp, "wb") as bundle:
+        bundle.write(HEADER.pack(MAGIC, VERSION, 0, len(entries)))
+        bundle.writelines(records)
+        bundle.writelines(blobs)
+    os.replace(temp, output)
+    return len(entries)
+
+
+class Bundle:
+    """Read-only view of a bundle file, serving images straight from the mapping.
+
+    Attributes:
+        filename (str): Path of the bundle file
+        records (dict of str/Record pairs): Entry locations by name
+
+    """
+
+    def __init__(self, filename: str):
+        """Map a bundle file and read its entry table.
+
+        Args:
+            filename: Path of the bundle file
+
+        Raises:
+            BundleError: File is not a bundle or has an unsupported version
+
+        """
+        self.filename = filename
+        with open(filename, "rb") as bundle:
+            self.map = mmap.mmap(bundle.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic, version, _, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise BundleError(f"{filename} is not a version {VERSION} dex bundle")
+        self.records: Dict[str, Record] = {}
+        for index in range(count):
+            name, *fields = RECORD.unpack_from(self.map, HEADER.size + index * RECORD.size)
+            self.records[name.rstrip(b"\x00").decode()] = Record(*fields)
+
+    def record(self, name: str) -> Record:
+        """Return the record for an entry.
+
+        Raises:
+            BundleError: No entry has the name
+
+        """
+        try:
+            return self.records[name]
+        except KeyError:
+            raise BundleError(f"{self.filename} has no entry '{name}'") from None
+
+    def asset(self, name: str) -> assets.Asset:
+        """Return an entry as an image and mask backed by the mapping.
+
+        Args:
+            name: Name of the entry
+
+        """
+        record = self.record(name)
+        size = (record.width, record.height)
+        length = record.width * record.height
+        image = Image.frombuffer("P", size, self.view[record.pixels : record.pixels + length], "raw", "P", 0, 1)
+        image.putpalette(self.view[record.palette : record.palette + PALETTE_SIZE])
+        mask = Image.frombuffer("L", size, self.view[record.mask : record.mask + length], "raw", "L", 0, 1)
+        return assets.Asset(image, mask)
+
+    def info(self, name: str) -> Dict[str, str]:
+        """Return the text metadata of an entry."""
+        record = self.record(name)
+        if not record.info_length:
+            return {}
+        return json.loads(bytes(self.view[record.info : record.info + record.info_length]))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.records
+
+    def __repr__(self) -> str:
+        return f"Bundle(filename='{self.filename}')"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Pack assets into a dex bundle.")
+    parser.add_argument("--assets", default="assets", help="assets directory to pack")
+    parser.add_argument("--output", default="assets.bundle", help="bundle file to write")
+    args = parser.parse_args()
+    print(f"Wrote {build(args.assets, args.output)} entries to {args.output}")
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Compose dex frames incrementally, redrawing only the panels whose content changed."""
+
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+from PIL import Image  # type: ignore
+from dex.font import Font
+from dex.poke import Pokemon
+from dex.render import compile_plan, frame_context, panel_rect
+from dex.screen import Screen, load_screen
+import dex.assets as assets
+import dex.trace as trace
+import random
+
+Rect = Tuple[int, int, int, int]
+
+
+class FrameUpdate(NamedTuple):
+    """Result of a compose, the frame, the regions that changed since the last one and the entry's page count.
+
+    Notes:
+        regions and bounds are in frame coordinates, as the frame is
+        composed. output_frame rotates the frame before pushing it, so
+        partial refreshes of the panel go by panel_regions and panel_bounds.
+
+    """
+
+    frame: Image.Image
+    regions: List[Rect]
+    pages: int = 1
+
+    @property
+    def bounds(self) -> Optional[Rect]:
+        """Smallest rectangle covering every changed region, None if nothing changed."""
+        return cover(self.regions)
+
+    @property
+    def panel_regions(self) -> List[Rect]:
+        """Changed regions where output_frame pushes them on the panel."""
+        return [panel_rect(region, self.frame.size) for region in self.regions]
+
+    @property
+    def panel_bounds(self) -> Optional[Rect]:
+        """Smallest panel rectangle covering every changed region, None if nothing changed."""
+        return cover(self.panel_regions)
+
+
+def cover(regions: Sequence[Rect]) -> Optional[Rect]:
+    """Return the smallest rectangle covering every region, None if there are none."""
+    if not regions:
+        return None
+    return (
+        min(region[0] for region in regions),
+        min(region[1] for region in regions),
+        max(region[2] for region in regions),
+        max(region[3] for region in regions),
+    )
+
+
+class Compositor:
+    """Keeps the previous frame and redraws a panel only when its content changes.
+
+    Attributes:
+        screen (Screen): Screen layout the frame is drawn with
+        frame (Image): The current composed frame
+        keys (dict of str/hashable pairs): Content drawn in each panel of the frame
+
+    """
+
+    def __init__(self, screen: Screen = None, pool: assets.AssetPool = None):
+        """Initialize a blank frame.
+
+        Args:
+            screen: Screen layout to draw with, the PHAT layout if not given
+            pool:   Asset pool to take UI pieces from, the shared pool if not given
+
+        """
+        self.screen = screen or load_screen()
+        self.frame = Image.new("P", self.screen.size)
+        self.pool = pool
+        self.keys: Dict[str, Hashable] = {}
+
+    def update(self, name: str, rect: Rect, key: Hashable, draw: Callable[[Image.Image], None]) -> Optional[Rect]:
+        """Redraw a panel if its content key differs from what the frame holds.
+
+        Args:
+            name: Name of the panel
+            rect: Area the panel draws in, cleared before drawing
+            key:  Value identifying the panel content
+            draw: Callable drawing the panel into the frame
+
+        Returns:
+            The panel area if it was redrawn, otherwise None
+
+        """
+        if name in self.keys and self.keys[name] == key:
+            return None
+        self.frame.paste(0, rect)
+        draw(self.frame)
+        self.keys[name] = key
+        return rect
+
+    def compose(
+        self,
+        font: Font,
+        mon: Pokemon,
+        entry: str = None,
+        entry_fonts: Sequence[Font] = None,
+        page: int = 0,
+        variant: int = None,
+    ) -> FrameUpdate:
+        """Bring the frame up to date with a pokemon, redrawing only changed panels.
+
+        Args:
+            font:        The font class in use
+            mon:         Pokemon to display
+            entry:       Dex entry to display, a random entry for the pokemon if not given
+            entry_fonts: Candidate fonts for the entry text, largest first, only font if not given
+            page:        Page of the entry to display when it doesn't fit on one frame
+            variant:     Index of the sprite frame to display, random if not given
+
+        Returns:
+            The frame, the regions redrawn and the number of pages the entry is laid out across
+
+        """
+        if variant is None:
+            variant = random.randrange(len(mon.sprite_set.sprites))
+        with trace.span("compose", id=mon.id):
+            context, pages = frame_context(font, mon, self.screen, entry, self.pool, entry_fonts, page, variant)
+            regions = [
+                self.update(step.name, step.rect, step.key(context), lambda img: step.draw(img, context))
+                for step in compile_plan(self.screen, font)
+            ]
+        return FrameUpdate(self.frame, [region for region in regions if region is not None], pages)
+
+    def invalidate(self) -> None:
+        """Forget what the frame holds so the next compose redraws every panel."""
+        self.keys.clear()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Precomputed evolution families, for drawing a species' whole evolution line at once.
+
+Notes:
+    The graph is built from a single query over the evolves table, joined
+    with the trigger and item names, then split into families: the species
+    connected by any chain of evolutions. A family is numbered by its lowest
+    unevolved species, lists its species and edges in evolution order and
+    spells out every chain from an unevolved species to a final evolution, so
+    branching lines such as eevee's get one chain per branch.
+
+    Looking up a species' family is a single dictionary access. Species with
+    no evolutions get a family of their own. Like DexSnapshot the graph can
+    be dumped to a JSON file and read back without SQLAlchemy.
+
+"""
+
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import dex.trace as trace
+import heapq
+import json
+import os
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session  # type: ignore
+
+
+class EvoEdge(NamedTuple):
+    """A single evolution and what triggers it."""
+
+    pre_evo: int
+    evo: int
+    trigger: str
+    level: Optional[int] = None
+    item: Optional[str] = None
+    additional_reqs: Optional[str] = None
+
+
+class Family(NamedTuple):
+    """Every species connected by evolution to each other.
+
+    Attributes:
+        id (int): Lowest national dex id among the unevolved species
+        species (tuple of int): Species in evolution order, earlier stages first
+        edges (tuple of EvoEdge): Evolutions in the order of their pre-evolutions
+        chains (tuple of tuple of int): Each line from an unevolved species to a final evolution
+
+    """
+
+    id: int
+    species: Tuple[int, ...]
+    edges: Tuple[EvoEdge, ...]
+    chains: Tuple[Tuple[int, ...], ...]
+
+    def evolutions(self, id: int) -> Tuple[EvoEdge, ...]:
+        """Return the evolutions of a species in the family."""
+        return tuple(edge for edge in self.edges if edge.pre_evo == id)
+
+    def pre_evolution(self, id: int) -> Optional[EvoEdge]:
+        """Return the evolution a species in the family evolves by, None if it is unevolved."""
+        return next((edge for edge in self.edges if edge.evo == id), None)
+
+    def stage(self, id: int) -> int:
+        """Return how many evolutions a species is from its unevolved form, 0 if it is unevolved."""
+        return next(chain.index(id) for chain in self.chains if id in chain)
+
+
+def order_family(members: Iterable[int], edges: List[EvoEdge]) -> Family:
+    """Order a family's species and edges by evolution and list its chains.
+
+    Args:
+        members: Species of the family
+        edges:   Evolutions between them
+
+    Raises:
+        ValueError: The evolutions form a cycle
+
+    """
+    members = sorted(members)
+    children: Dict[int, List[EvoEdge]] = {id: [] for id in members}
+    parents = {id: 0 for id in members}
+    for edge in sorted(edges, key=lambda edge: (edge.pre_evo, edge.evo)):
+        children[edge.pre_evo].append(edge)
+        parents[edge.evo] += 1
+    roots = [id for id in members if parents[id] == 0]
+
+    ready = list(roots)
+    heapq.heapify(ready)
+    species = []
+    while ready:
+        id = heapq.heappop(ready)
+        species.append(id)
+        for edge in children[id]:
+            parents[edge.evo] -= 1
+            if parents[edge.evo] == 0:
+                heapq.heappush(ready, edge.evo)
+    if len(species) < len(members):
+        raise ValueError(f"Evolutions of species {members} form a cycle")
+
+    chains = []
+    pending = [(root,) for root in reversed(roots)]
+    while pending:
+        chain = pending.pop()
+        following = children[chain[-1]]
+        if not following:
+            chains.append(chain)
+        pending.extend(chain + (edge.evo,) for edge in reversed(following))
+
+    ordered = tuple(edge for id in species for edge in children[id])
+    return Family(roots[0], tuple(species), ordered, tuple(chains))
+
+
+class EvolutionGraph:
+    """Evolution families of every species, looked up by national dex id.
+
+    Attributes:
+        families (list of Family): Families with at least one evolution, by family id
+        family_of (dict of int/int): Index into families of each species that evolves or evolved
+
+    """
+
+    def __init__(self, families: List[Family]):
+        """Initialize the lookup from prepared families.
+
+        Args:
+            families: Families with at least one evolution
+
+        """
+        self.families = sorted(families)
+        self.family_of = {id: index for index, family in enumerate(self.families) for id in family.species}
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[EvoEdge]) -> "EvolutionGraph":
+        """Group evolutions into families.
+
+        Args:
+            edges: Every evolution, in any order
+
+        Raises:
+            ValueError: Some evolutions form a cycle
+
+        """
+        edges = list(edges)
+        root = {}
+
+        def find(id: int) -> int:
+            while root.setdefault(id, id) != id:
+                root[id] = root[root[id]]
+                id = root[id]
+            return id
+
+        for edge in edges:
+            root[find(edge.evo)] = find(edge.pre_evo)
+
+        members: Dict[int, List[int]] = {}
+        for id in list(root):
+            members.setdefault(find(id), []).append(id)
+        grouped: Dict[int, List[EvoEdge]] = {group: [] for group in members}
+        for edge in edges:
+            grouped[find(edge.pre_evo)].append(edge)
+        return cls([order_family(members[group], grouped[group]) for group in members])
+
+    @classmethod
+    def load(cls, session: "Session") -> "EvolutionGraph":
+        """Build the graph with a single query over every evolution.
+
+        Args:
+            session: Database session to query
+
+        """
+        import db.pokeschema as pokeschema  # type: ignore
+
+        Evolution = pokeschema.Evolution
+        with trace.span("db.evolution"):
+            rows = (
+                session.query(
+                    Evolution.pre_evo_id,
+                    Evolution.evo_id,
+                    pokeschema.EvoTrigger.trigger,
+                    Evolution.level,
+                    pokeschema.Item.name,
+                    Evolution.additional_reqs,
+                )
+                .join(pokeschema.EvoTrigger, Evolution.trigger_id == pokeschema.EvoTrigger.id)
+                .outerjoin(pokeschema.Item, Evolution.item_id == pokeschema.Item.id)
+                .all()
+            )
+        return cls.from_edges(EvoEdge(*row) for row in rows)
+
+    @classmethod
+    def read(cls, filename: str) -> "EvolutionGraph":
+        """Load a graph written by dump, without touching the database.
+
+        Args:
+            filename: Path of the evolution file
+
+        """
+        with trace.span("evolution.read"), open(filename) as evolution_file:
+            rows = json.load(evolution_file)
+        return cls.from_edges(EvoEdge(*row) for row in rows)
+
+    def dump(self, filename: str) -> None:
+        """Write every evolution to a JSON file, one [pre_evo, evo, trigger, level, item, additional_reqs] row each.
+
+        Args:
+            filename: Path of the evolution file, replaced atomically
+
+        """
+        temp = filename + ".tmp"
+        with open(temp, "w") as out:
+            json.dump([list(edge) for family in self.families for edge in family.edges], out)
+        os.replace(temp, filename)
+
+    def family(self, id: int) -> Family:
+        """Return the family of a species, a family of its own if it never evolves.
+
+        Args:
+            id: National dex id of the species
+
+        """
+        index = self.family_of.get(id)
+        if index is None:
+            return Family(id, (id,), (), ((id,),))
+        return self.families[index]
+
+    def __contains__(self, id: int) -> bool:
+        return id in self.family_of
+
+    def __len__(self) -> int:
+        return len(self.families)
+
+    def __repr__(self) -> str:
+        return f"EvolutionGraph(families={len(self.families)}, species={len(self.family_of)})"
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Render the same species to several displays at once, sharing fonts, assets and data.
+
+Notes:
+    Displays are configured in config/displays.ini, one section per panel
+    naming its screen layout, colour variant and preview file.
+
+    Each display has its own compositor and worker thread. Frames are
+    composed one at a time, since the font and asset caches are shared and
+    not thread safe, then pushed to the panels concurrently, so the slow
+    e-ink refreshes overlap instead of running back to back.
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from dex.compositor import Compositor, FrameUpdate
+from dex.font import Font
+from dex.poke import Pokemon
+from dex.render import init_display, output_frame
+from dex.screen import Screen, load_screen
+import dex.assets as assets
+import dex.trace as trace
+import random
+import threading
+
+
+class Display(NamedTuple):
+    """A configured panel, its layout, colour variant and preview file."""
+
+    name: str
+    screen: Screen
+    colour: str = "yellow"
+    output: Optional[str] = None
+
+
+def load_displays(config: str = "config/displays.ini") -> Tuple[Display, ...]:
+    """Read the configured displays.
+
+    Args:
+        config: Path to the displays config file
+
+    Raises:
+        ValueError: The config has no displays
+
+    """
+    parser = ConfigParser()
+    parser.read(config)
+    displays = tuple(
+        Display(
+            name,
+            load_screen(parser[name].get("screen", "phat")),
+            parser[name].get("colour", "yellow"),
+            parser[name].get("output"),
+        )
+        for name in parser.sections()
+    )
+    if not displays:
+        raise ValueError(f"No displays configured in {config}")
+    return displays
+
+
+class Target:
+    """A display with its inky driver and the compositor holding its last frame.
+
+    Attributes:
+        display (Display): Configuration of the display
+        inky_display: Inky display frames are pushed to, None if unavailable
+        compositor (Compositor): Holds the last frame so unchanged panels are not redrawn
+
+    """
+
+    def __init__(self, display: Display, pool: assets.AssetPool = None):
+        """Initialize the inky driver and a blank frame for a display.
+
+        Args:
+            display: Configuration of the display
+            pool:    Asset pool to draw from, the shared pool if not given
+
+        """
+        self.display = display
+        self.inky_display, _ = init_display(display.colour, display.screen)
+        self.compositor = Compositor(display.screen, pool)
+
+    def __repr__(self) -> str:
+        return f"Target(name='{self.display.name}', screen='{self.display.screen.name}')"
+
+
+class FanOut:
+    """Renders each frame to every configured display, pushing to the panels in parallel.
+
+    Attributes:
+        targets (list of Target): Displays frames are rendered to
+        lock (Lock): Serializes composition, which uses the shared caches
+
+    """
+
+    def __init__(self, displays: Sequence[Display], pool: assets.AssetPool = None):
+        """Initialize every display and a worker thread for each.
+
+        Args:
+            displays: Displays to render to
+            pool:     Asset pool shared by every display, the shared pool if not given
+
+        """
+        self.targets = [Target(display, pool) for display in displays]
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=len(self.targets), thread_name_prefix="display")
+
+    def render(
+        self,
+        font: Font,
+        mon: Pokemon,
+        entry_fonts: Sequence[Font] = None,
+        entry: str = None,
+        page: int = 0,
+        variant: int = None,
+    ) -> List[FrameUpdate]:
+        """Render a pokemon to every display and wait for every panel to finish refreshing.
+
+        Args:
+            font:        The font class in use
+            mon:         Pokemon to display
+            entry_fonts: Candidate fonts for the entry text, largest first, only font if not given
+            entry:       Dex entry to display, a random entry for the pokemon if not given
+            page:        Page of the entry to display, displays with fewer pages show their last
+            variant:     Index of the sprite frame to display, random if not given
+
+        Returns:
+            The frame, changed regions and entry page count of each display, in target order
+
+        Notes:
+            Every display shows the same entry and sprite frame.
+
+        """
+        if entry is None:
+            entry = random.choice(mon.entries)
+        if variant is None:
+            variant = random.randrange(len(mon.sprite_set.sprites))
+        spans = trace.current()
+        futures = [
+            self.executor.submit(self.push, target, font, mon, entry, entry_fonts, page, variant, spans)
+            for target in self.targets
+        ]
+        return [future.result() for future in futures]
+
+    def push(
+        self,
+        target: Target,
+        font: Font,
+        mon: Pokemon,
+        entry: str,
+        entry_fonts: Optional[Sequence[Font]],
+        page: int,
+        variant: int,
+        spans: Sequence[trace.Span] = (),
+    ) -> FrameUpdate:
+        """Compose a display's frame and push it if anything changed, run on the display's worker thread.
+
+        Notes:
+            spans are the trace spans open where render was called, so the
+            worker's spans count towards the caller's frame.
+
+        """
+        with trace.adopt(spans):
+            with self.lock:
+                update = target.compositor.compose(font, mon, entry, entry_fonts, page, variant)
+            if update.regions:
+                with trace.span("display.push", display=target.display.name):
+                    output_frame(update.frame, target.inky_display, target.display.output)
+        return update
+
+    def close(self) -> None:
+        """Wait for pending pushes and stop the worker threads."""
+        self.executor.shutdown()
+
+    def __repr__(self) -> str:
+        return f"FanOut(displays={[target.display.name for target in self.targets]})"
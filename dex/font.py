@@ -8,21 +8,118 @@ Todo:
 
 """
 
-import re
+from collections import OrderedDict
+from functools import lru_cache
 from PIL import Image  # type: ignore
-from typing import Union
-import png  # type: ignore
+from typing import Dict, Hashable, NamedTuple, Optional, Tuple, Union
+import copy
+import os
+from dex.bundle import Bundle
 import dex.util as util  # type: ignore
 
 
+class Glyph(NamedTuple):
+    """Cropped character sprite with its paste mask and non-transparent bounds."""
+
+    sprite: Image.Image
+    mask: Image.Image
+    bounds: Optional[Tuple[int, int, int, int]]
+
+
+class TextRun(NamedTuple):
+    """Rendered line of text with its paste mask."""
+
+    image: Image.Image
+    mask: Image.Image
+
+
+class TextRunCache:
+    """Bounded least recently used cache of rendered text runs.
+
+    Attributes:
+        maxsize (int): Maximum number of runs kept
+        hits (int): Lookups served from the cache
+        misses (int): Lookups that had to render a new run
+
+    """
+
+    def __init__(self, maxsize: int = 512):
+        """Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of runs kept
+
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.runs: "OrderedDict[Hashable, TextRun]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[TextRun]:
+        """Return the cached run for key, or None if it has not been rendered."""
+        run = self.runs.get(key)
+        if run is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.runs.move_to_end(key)
+        return run
+
+    def put(self, key: Hashable, run: TextRun) -> None:
+        """Store a run, dropping the stalest entry if the cache is full."""
+        self.runs[key] = run
+        if len(self.runs) > self.maxsize:
+            self.runs.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached run and reset the counters."""
+        self.runs.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.runs)
+
+    def __repr__(self) -> str:
+        return f"TextRunCache(maxsize={self.maxsize}, size={len(self)}, hits={self.hits}, misses={self.misses})"
+
+
+@lru_cache(maxsize=16)
+def parse_metadata(path: str, mtime: int) -> Dict[str, str]:
+    """Parse the text chunks of a font sheet, memoized per path and modification time."""
+    return util.read_png_text(path)
+
+
+def read_metadata(filename: str) -> Dict[str, str]:
+    """Return the text chunks of a font sheet, parsing the file again only when it has changed.
+
+    Args:
+        filename: Filename of the font image
+
+    """
+    path = os.path.abspath(filename)
+    return parse_metadata(path, os.stat(path).st_mtime_ns)
+
+
 class Font:
     """Font object for use in dex routines."""
 
-    def __init__(self, filename: str):
+    def __init__(
+        self,
+        filename: str,
+        atlas_size: int = 256,
+        preload: bool = False,
+        run_cache_size: int = 512,
+        bundle: Bundle = None,
+    ):
         """Initialize values for font object.
 
         Args:
-            filename: Filename of the font image to load
+            filename:       Filename of the font image to load
+            atlas_size:     Maximum number of glyphs kept in the atlas
+            preload:        Fill the atlas with every character on the sheet up front
+            run_cache_size: Maximum number of rendered strings and numerals kept
+            bundle:         Asset bundle to take the sheet and metadata from instead of the file
 
         """
         self.filename = filename
@@ -30,43 +127,140 @@ class Font:
         self.charheight: int
         self.sheetwidth: int
         self.sheetstring: str
-        self.image: Image.Image = Image.open(self.filename)
+        self.bundle = bundle
+        self.bundle_name = f"ui/{os.path.splitext(os.path.basename(filename))[0]}"
+        if bundle is not None:
+            self.image: Image.Image = bundle.asset(self.bundle_name).image
+        else:
+            self.image = Image.open(self.filename)
+        self.scale = 1
+        self.scaled_fonts: Dict[int, "Font"] = {}
+        self.atlas_size = atlas_size
+        self.atlas: "OrderedDict[str, Glyph]" = OrderedDict()
+        self.runs = TextRunCache(run_cache_size)
         self.update_metadata()
+        if preload:
+            self.preload_atlas()
 
     def update_metadata(self) -> None:
-        """Load metadata from font png chunks."""
-        sheet = png.Reader(filename=self.filename)
-        chunk_list = list(sheet.chunks())
-        metadata = {}
-
-        for chunk in chunk_list:
-            if re.compile(b"..Xt").match(chunk[0]):
-                decoded = bytes.decode(chunk[1]).split("\x00")
-                keyword = decoded[0]
-                value = decoded[-1]
-                if keyword != "SHEETSTRING":
-                    metadata[keyword] = int(value)
-                else:
-                    self.sheetstring = value
-
-        self.charwidth = metadata["CHARWIDTH"]
-        self.charheight = metadata["CHARHEIGHT"]
-        self.sheetwidth = metadata["SHEETWIDTH"]
+        """Load metadata from font png chunks, or from the bundle entry if loaded from a bundle."""
+        if self.bundle is not None:
+            text = self.bundle.info(self.bundle_name)
+        else:
+            text = read_metadata(self.filename)
+
+        self.sheetstring = text["SHEETSTRING"]
+        self.charwidth = int(text["CHARWIDTH"])
+        self.charheight = int(text["CHARHEIGHT"])
+        self.sheetwidth = int(text["SHEETWIDTH"])
         self.pixel_gap = int(0.125 * self.charwidth)
 
-    def get_character(self, character: str) -> Image.Image:
-        """Return a single character from the font sheet.
+    def scaled(self, factor: int) -> "Font":
+        """Return this font upscaled by an integer factor.
+
+        Args:
+            factor: Whole number to multiply the sheet and character sizes by
+
+        Notes:
+            Scaled fonts are kept per factor. The sheet is upscaled once with
+            nearest neighbour sampling, so the scaled font crops, masks and
+            caches its own glyphs and runs without resampling them again.
+
+        """
+        if factor == 1:
+            return self
+        try:
+            return self.scaled_fonts[factor]
+        except KeyError:
+            pass
+
+        font = copy.copy(self)
+        font.image = util.scale_image(self.image, factor)
+        font.scale = self.scale * factor
+        font.charwidth = self.charwidth * factor
+        font.charheight = self.charheight * factor
+        font.pixel_gap = int(0.125 * font.charwidth)
+        font.scaled_fonts = {}
+        font.atlas = OrderedDict()
+        font.runs = TextRunCache(self.runs.maxsize)
+        self.scaled_fonts[factor] = font
+        return font
+
+    def preload_atlas(self) -> None:
+        """Fill the glyph atlas with every distinct character on the sheet."""
+        for character in dict.fromkeys(self.sheetstring):
+            self.get_glyph(character)
+
+    def get_glyph(self, character: str) -> Glyph:
+        """Return the atlas entry for a character, cropping it on first use.
 
         Args:
             character: The character or special character replacement to fetch
 
+        Notes:
+            The atlas is least recently used, once it holds atlas_size glyphs
+            the stalest entry is dropped to make room.
+
         """
+        try:
+            self.atlas.move_to_end(character)
+            return self.atlas[character]
+        except KeyError:
+            pass
+
         index = self.sheetstring.index(character)
         sheet_x = (index % self.sheetwidth) * self.charwidth
         sheet_y = (int(index / self.sheetwidth)) * self.charheight
         right_bound = sheet_x + self.charwidth
         lower_bound = sheet_y + self.charheight
-        return self.image.crop((sheet_x, sheet_y, right_bound, lower_bound))
+        sprite = self.image.crop((sheet_x, sheet_y, right_bound, lower_bound))
+        glyph = Glyph(sprite, util.alpha_plane(sprite), util.get_real_bounds(sprite))
+
+        self.atlas[character] = glyph
+        if len(self.atlas) > self.atlas_size:
+            self.atlas.popitem(last=False)
+        return glyph
+
+    def get_character(self, character: str) -> Image.Image:
+        """Return a single character from the font sheet.
+
+        Args:
+            character: The character or special character replacement to fetch
+
+        """
+        return self.get_glyph(character).sprite
+
+    def string_run(self, line: str) -> TextRun:
+        """Return a rendered line and its mask, reusing a cached run if present.
+
+        Args:
+            line: The line to build and fetch
+
+        """
+        key = ("string", line, None, None)
+        run = self.runs.get(key)
+        if run is None:
+            out = self.build_string(line)
+            run = TextRun(out, util.alpha_plane(out))
+            self.runs.put(key, run)
+        return run
+
+    def numeral_run(self, num: Union[int, float], prefix: str = None, suffix: str = None) -> TextRun:
+        """Return a rendered numeral and its mask, reusing a cached run if present.
+
+        Args:
+            num:     Numeral to format
+            prefix:  Optional prefix character(s) to include
+            postfix: Optional postfix character(s) to include
+
+        """
+        key = ("numeral", repr(num), prefix, suffix)
+        run = self.runs.get(key)
+        if run is None:
+            out = self.build_numeral(num, prefix, suffix)
+            run = TextRun(out, util.alpha_plane(out))
+            self.runs.put(key, run)
+        return run
 
     def get_string(self, line: str) -> Image.Image:
         """Return a line using characters from the font sheet.
@@ -74,14 +268,40 @@ class Font:
         Args:
             line: The line to build and fetch
 
+        Notes:
+            The returned image is shared through the run cache and should not be modified.
+
+        """
+        return self.string_run(line).image
+
+    def get_numeral(self, num: Union[int, float], prefix: str = None, suffix: str = None) -> Image.Image:
+        """Return a numeral formatted cleanly with pre/postfixes in font.
+
+        Args:
+            num:     Numeral to format
+            prefix:  Optional prefix character(s) to include
+            postfix: Optional postfix character(s) to include
+
+        Notes:
+            The returned image is shared through the run cache and should not be modified.
+
+        """
+        return self.numeral_run(num, prefix, suffix).image
+
+    def build_string(self, line: str) -> Image.Image:
+        """Render a line using characters from the font sheet, bypassing the run cache.
+
+        Args:
+            line: The line to build
+
         """
         out = Image.new("P", (self.charwidth * len(line), self.charheight))
         for index, character in enumerate(line, 0):
-            out.paste(self.get_character(character), (index * self.charwidth, 0))
+            out.paste(self.get_glyph(character).sprite, (index * self.charwidth, 0))
         return out
 
-    def get_numeral(self, num: Union[int, float], prefix: str = None, suffix: str = None) -> Image.Image:
-        """Return a numeral formatted cleanly with pre/postfixes in font.
+    def build_numeral(self, num: Union[int, float], prefix: str = None, suffix: str = None) -> Image.Image:
+        """Render a numeral with pre/postfixes in font, bypassing the run cache.
 
         Args:
             num:     Numeral to format
@@ -108,49 +328,47 @@ class Font:
         #     suff_len = sum([cw - pg if letter.islower() else cw for letter in suffix])
 
         # calc final width and generate base image
-        final_width = pre_len + suff_len + num_len * cw + 4 * is_float
+        final_width = pre_len + suff_len + num_len * cw + int(cw / 2) * is_float
         out = Image.new("P", (final_width, self.charheight))
 
         # add suffix
         offset = final_width
         if suffix is not None:
             for character in suffix[::-1]:
-                temp = self.get_character(character)
-                temp_bb = util.get_real_bounds(temp)
-                temp_w = temp_bb[2] - temp_bb[0]
+                glyph = self.get_glyph(character)
+                temp_w = glyph.bounds[2] - glyph.bounds[0]
                 offset -= temp_w + pg
-                out.paste(temp, (offset, 0), util.create_mask(temp))
+                util.blit(out, glyph.sprite, (offset, 0), glyph.mask)
             offset += cw - temp_w - 2 * pg
 
         # add float
         if is_float:
             pre_float, post_float = snum.split(".")
             offset -= len(post_float) * cw
-            temp = self.get_string(post_float)
-            out.paste(temp, (offset, 0), util.create_mask(temp))
+            temp = self.string_run(post_float)
+            util.blit(out, temp.image, (offset, 0), temp.mask)
             offset -= int(cw / 2) + pg
-            temp = self.get_character(".")
-            out.paste(temp, (offset, 0), util.create_mask(temp))
+            glyph = self.get_glyph(".")
+            util.blit(out, glyph.sprite, (offset, 0), glyph.mask)
             offset -= len(pre_float) * cw - 2 * pg
-            temp = self.get_string(pre_float)
-            out.paste(temp, (offset, 0), util.create_mask(temp))
+            temp = self.string_run(pre_float)
+            util.blit(out, temp.image, (offset, 0), temp.mask)
 
         # add integer
         if not is_float:
             offset -= len(snum) * cw - pg
-            temp = self.get_string(snum)
-            out.paste(temp, (offset, 0), util.create_mask(temp))
+            temp = self.string_run(snum)
+            util.blit(out, temp.image, (offset, 0), temp.mask)
 
         # add prefix
         if prefix is not None:
             for character in prefix[::-1]:
-                temp = self.get_character_character()
-                temp_bb = util.get_real_bounds(temp)
-                temp_w = temp_bb[2] - temp_bb[0]
+                glyph = self.get_glyph(character)
+                temp_w = glyph.bounds[2] - glyph.bounds[0]
                 offset -= temp_w + pg
-                out.paste(temp, (offset, 0), util.create_mask(temp))
+                util.blit(out, glyph.sprite, (offset, 0), glyph.mask)
 
         return out
 
     def __repr__(self) -> str:
-        return f"Font(filename='{self.filename}')"
+        return f"Font(filename='{self.filename}', scale={self.scale})"
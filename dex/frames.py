@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Render every dex frame ahead of time into an on-disk frame cache.
+
+Notes:
+    A frame cache directory holds one raw palette buffer per frame, one byte
+    per pixel, alongside a manifest.json describing them:
+
+        {
+            "width": 212, "height": 104, "palette": [...],
+            "frames": [{"file": "129-0-0-0.raw", "id": 129, "sprite": 0, "entry": 0, "page": 0}, ...]
+        }
+
+    Frames are stored unrotated, output_frame rotates them for the panel.
+
+"""
+
+from multiprocessing import Pool
+from PIL import Image  # type: ignore
+from typing import Dict, List, Optional, Sequence, Tuple
+from dex.font import Font
+from dex.poke import DexSnapshot, Pokemon
+from dex.render import render_frame
+from dex.screen import Screen, load_screen
+import dex.assets as assets
+import json
+import logging
+import os
+import random
+
+MANIFEST = "manifest.json"
+PALETTE = [255, 255, 255, 0, 0, 0, 255, 0, 0]
+
+worker: Dict = {}
+
+
+def init_worker(snapshot: DexSnapshot, font: str, large_font: Optional[str], directory: str, screen: Screen) -> None:
+    """Load the fonts and snapshot a pool worker renders with.
+
+    Args:
+        snapshot:   Species data to render from
+        font:       Filename of the font image to load
+        large_font: Filename of a larger font preferred for short entries, None for only font
+        directory:  Frame cache directory to write frames to
+        screen:     Screen layout to draw with
+
+    """
+    worker["snapshot"] = snapshot
+    worker["font"] = Font(font, preload=True)
+    worker["entry_fonts"] = (worker["font"],)
+    if large_font is not None:
+        worker["entry_fonts"] = (Font(large_font, preload=True), worker["font"])
+    worker["directory"] = directory
+    worker["screen"] = screen
+
+
+def render_species(id: int) -> List[Dict]:
+    """Render every sprite, entry and page combination of a species in a pool worker.
+
+    Args:
+        id: National dex id of the species
+
+    Returns:
+        Manifest records of the frames written
+
+    """
+    mon = Pokemon(id, snapshot=worker["snapshot"])
+    records = []
+    for sprite in range(len(mon.sprite_set.sprites)):
+        for entry_index, entry in enumerate(mon.entries):
+            page = 0
+            pages = 1
+            while page < pages:
+                img = Image.new("P", worker["screen"].size)
+                pages = render_frame(
+                    img, worker["font"], mon, entry, None, worker["entry_fonts"], page, sprite, worker["screen"]
+                )
+                name = f"{id:03d}-{sprite}-{entry_index}-{page}.raw"
+                with open(os.path.join(worker["directory"], name), "wb") as frame:
+                    frame.write(img.tobytes())
+                records.append({"file": name, "id": id, "sprite": sprite, "entry": entry_index, "page": page})
+                page += 1
+    return records
+
+
+def render_all(
+    snapshot: DexSnapshot,
+    directory: str,
+    font: str = "assets/ui/gscfont.png",
+    large_font: Optional[str] = None,
+    processes: Optional[int] = None,
+    ids: Sequence[int] = None,
+    screen: Screen = None,
+) -> int:
+    """Render every frame of every species into a frame cache, across a process pool.
+
+    Args:
+        snapshot:   Species data to render from
+        directory:  Frame cache directory, created if missing
+        font:       Filename of the font image to load
+        large_font: Filename of a larger font preferred for short entries
+        processes:  Number of worker processes, one per core if not given
+        ids:        National dex ids to render, every species with a sprite sheet if not given
+        screen:     Screen layout to draw with, the PHAT layout if not given
+
+    Returns:
+        Number of frames written
+
+    """
+    logger = logging.getLogger(__name__)
+    os.makedirs(directory, exist_ok=True)
+    screen = screen or load_screen()
+    if ids is None:
+        ids = [id for id in assets.pool.sprite_ids() if id in snapshot]
+
+    frames: List[Dict] = []
+    with Pool(processes, init_worker, (snapshot, font, large_font, directory, screen)) as pool:
+        for records in pool.imap_unordered(render_species, ids):
+            frames.extend(records)
+    frames.sort(key=lambda frame: (frame["id"], frame["sprite"], frame["entry"], frame["page"]))
+
+    manifest = {"width": screen.width, "height": screen.height, "palette": PALETTE, "frames": frames}
+    temp = os.path.join(directory, MANIFEST + ".tmp")
+    with open(temp, "w") as out:
+        json.dump(manifest, out)
+    os.replace(temp, os.path.join(directory, MANIFEST))
+    logger.info(f"Rendered {len(frames)} frames for {len(ids)} species into {directory}")
+    return len(frames)
+
+
+class FrameCache:
+    """Pre-rendered frames read back from a frame cache directory.
+
+    Attributes:
+        directory (str): Frame cache directory
+        size (tuple of int): Frame width and height
+        frames (list of dict): Manifest records, one per frame
+
+    """
+
+    def __init__(self, directory: str):
+        """Read the manifest of a frame cache.
+
+        Args:
+            directory: Frame cache directory written by render_all
+
+        """
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST)) as manifest_file:
+            manifest = json.load(manifest_file)
+        self.size: Tuple[int, int] = (manifest["width"], manifest["height"])
+        self.palette: List[int] = manifest["palette"]
+        self.frames: List[Dict] = manifest["frames"]
+
+    def frames_for(self, id: int) -> List[Dict]:
+        """Return the manifest records of every frame of a species."""
+        return [frame for frame in self.frames if frame["id"] == id]
+
+    def load(self, frame: Dict) -> Image.Image:
+        """Read a frame back as a palette image.
+
+        Args:
+            frame: Manifest record of the frame
+
+        """
+        with open(os.path.join(self.directory, frame["file"]), "rb") as raw:
+            img = Image.frombytes("P", self.size, raw.read())
+        img.putpalette(self.palette)
+        return img
+
+    def random_frame(self, id: int = None) -> Image.Image:
+        """Read the first page of a random entry, of a given species if id is given.
+
+        Raises:
+            IndexError: No frames are cached for the species
+
+        Notes:
+            Later pages of a long entry are never picked, they only make sense
+            after the pages before them.
+
+        """
+        frames = self.frames_for(id) if id is not None else self.frames
+        return self.load(random.choice([frame for frame in frames if frame.get("page", 0) == 0]))
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __repr__(self) -> str:
+        return f"FrameCache(directory='{self.directory}')"
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Measure, wrap and page dex entry text for a font and text box.
+
+Notes:
+    Glyphs are placed on a fixed grid of font.charwidth cells, so a line is
+    as wide as the cells before its last character plus the inked width of
+    that character. Trailing spaces take no room.
+
+"""
+
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Sequence, Tuple
+from dex.font import Font
+
+
+class Box(NamedTuple):
+    """Text area in pixels, with the gap left between lines."""
+
+    width: int
+    height: int
+    line_gap: int = 4
+
+
+class Layout(NamedTuple):
+    """Entry text wrapped and paged for a chosen font."""
+
+    font: Font
+    pages: Tuple[Tuple[str, ...], ...]
+
+
+def measure(font: Font, text: str) -> int:
+    """Return the width in pixels a line of text occupies.
+
+    Args:
+        font: The font class in use
+        text: Line to measure
+
+    """
+    text = text.rstrip(" ")
+    if not text:
+        return 0
+    bounds = font.get_glyph(text[-1]).bounds
+    last = bounds[2] if bounds is not None else 0
+    return (len(text) - 1) * font.charwidth + last
+
+
+def wrap(text: str, width: int, measure: Callable[[str], int]) -> List[str]:
+    """Split text into lines no wider than width, hyphenating words that straddle a line end.
+
+    Args:
+        text:    Text to wrap
+        width:   Maximum line width, in the units measure returns
+        measure: Callable returning the width of a line of text
+
+    Returns:
+        A list of lines, without trailing spaces
+
+    Notes:
+        A word that does not fit the rest of a line is split with a hyphen as
+        long as at least two of its characters stay on the line, otherwise it
+        starts the next line.
+
+    """
+    lines = [""]
+    for word in text.split(" "):
+        while word:
+            line = lines[-1]
+            prefix = line + " " if line else ""
+            if measure(prefix + word) <= width:
+                lines[-1] = prefix + word
+                break
+            cut = len(word) - 1
+            while cut >= 2 and measure(prefix + word[:cut] + "-") > width:
+                cut -= 1
+            if cut >= 2:
+                lines[-1] = prefix + word[:cut] + "-"
+                word = word[cut:]
+            elif not line:
+                # nothing fits on an empty line, let the word overflow rather than loop
+                lines[-1] = word
+                break
+            lines.append("")
+    while len(lines) > 1 and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def lines_per_page(font: Font, box: Box) -> int:
+    """Return how many lines of a font fit in a box."""
+    return max(1, (box.height + box.line_gap) // (font.charheight + box.line_gap))
+
+
+@lru_cache(maxsize=1024)
+def layout_entry(entry: str, fonts: Tuple[Font, ...], box: Box) -> Layout:
+    """Wrap and page an entry, choosing the first font it fits on one page with.
+
+    Args:
+        entry: The entry to lay out, already formatted for the font sheet
+        fonts: Candidate fonts in order of preference, largest first
+        box:   Text area to fit the entry in
+
+    Returns:
+        The layout for the first font that fits the entry on a single page,
+        or the entry paged across several frames using the last font
+
+    Notes:
+        Layouts are memoized per (entry, fonts, box), so each entry is only
+        measured once.
+
+    """
+    for font in fonts:
+        lines = wrap(entry, box.width, lambda text: measure(font, text))
+        per_page = lines_per_page(font, box)
+        if len(lines) <= per_page or font is fonts[-1]:
+            pages = tuple(tuple(lines[i : i + per_page]) for i in range(0, len(lines), per_page))
+            return Layout(font, pages)
+    raise ValueError("layout_entry needs at least one font")
+
+
+def page_count(entry: str, fonts: Sequence[Font], box: Box) -> int:
+    """Return how many frames an entry is paged across."""
+    return len(layout_entry(entry, tuple(fonts), box).pages)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Clean the greenscreen out of asset pngs, in parallel, skipping files already processed.
+
+Notes:
+    Sprites and UI pieces are drawn with their transparent pixels painted in
+    the fourth colour of the colormap, palette index 3. Processing a file
+    validates that it is a palette image whose transparency, if it has one,
+    is index 3, then re-encodes it with index 3 as the transparency key. Text
+    chunks such as font sheet metadata are carried over.
+
+    A manifest in the assets directory records the size, modification time
+    and sha256 of every processed file. Files whose size and time still match
+    are skipped without being read, and files whose contents still hash the
+    same are skipped without being decoded. Everything else is processed
+    across a process pool and written to a temporary file that is renamed
+    over the original.
+
+"""
+
+from io import BytesIO
+from multiprocessing import Pool
+from PIL import Image, PngImagePlugin  # type: ignore
+from typing import Dict, List, NamedTuple, Optional
+import glob
+import hashlib
+import json
+import logging
+import os
+
+MANIFEST = ".greenscreen.json"
+TRANSPARENT = 3
+PATTERNS = ("sprites/*.png", "ui/*.png")
+
+
+class AssetError(Exception):
+    """Raised when an asset cannot be processed, such as a missing transparency index."""
+
+
+class Processed(NamedTuple):
+    """Manifest entry of a processed file."""
+
+    size: int
+    mtime: int
+    sha256: str
+
+
+def digest(data: bytes) -> str:
+    """Return the sha256 hex digest of file contents."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def validate(image: Image.Image, path: str) -> None:
+    """Check an asset can be greenscreened.
+
+    Args:
+        image: Decoded asset
+        path:  Path of the asset, for error messages
+
+    Raises:
+        AssetError: The image is not a palette image, has too small a palette,
+            or already marks another index as transparent
+
+    """
+    if image.mode != "P":
+        raise AssetError(f"{path} is a {image.mode} image, assets must be palette images")
+    palette = image.getpalette() or []
+    if len(palette) < 3 * (TRANSPARENT + 1):
+        raise AssetError(f"{path} has {len(palette) // 3} palette colours, index {TRANSPARENT} is the greenscreen")
+    transparency = image.info.get("transparency")
+    if transparency is not None and transparency != TRANSPARENT:
+        raise AssetError(f"{path} uses transparency {transparency!r}, expected palette index {TRANSPARENT}")
+
+
+def encode(data: bytes, path: str) -> bytes:
+    """Re-encode a png with index 3 as its transparency key, keeping its text chunks.
+
+    Args:
+        data: Contents of the png
+        path: Path of the png, for error messages
+
+    Returns:
+        Contents of the processed png
+
+    """
+    with Image.open(BytesIO(data)) as image:
+        image.load()
+        validate(image, path)
+        text = PngImagePlugin.PngInfo()
+        for key, value in getattr(image, "text", {}).items():
+            text.add_text(key, value)
+        out = BytesIO()
+        image.save(out, "PNG", transparency=TRANSPARENT, optimize=1, pnginfo=text)
+    return out.getvalue()
+
+
+def process(path: str) -> Processed:
+    """Greenscreen a single file in place, leaving it untouched if it is already processed.
+
+    Args:
+        path: Path of the png
+
+    Returns:
+        Manifest entry for the processed file
+
+    """
+    with open(path, "rb") as source:
+        data = source.read()
+    processed = encode(data, path)
+    if processed != data:
+        temp = path + ".tmp"
+        with open(temp, "wb") as out:
+            out.write(processed)
+        os.replace(temp, path)
+    stat = os.stat(path)
+    return Processed(stat.st_size, stat.st_mtime_ns, digest(processed))
+
+
+def load_manifest(directory: str) -> Dict[str, Processed]:
+    """Read the manifest of an assets directory, empty if there is none."""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as manifest_file:
+            return {name: Processed(*entry) for name, entry in json.load(manifest_file).items()}
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(directory: str, manifest: Dict[str, Processed]) -> None:
+    """Write the manifest of an assets directory atomically."""
+    path = os.path.join(directory, MANIFEST)
+    with open(path + ".tmp", "w") as out:
+        json.dump({name: list(entry) for name, entry in sorted(manifest.items())}, out, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def is_current(path: str, entry: Optional[Processed]) -> Optional[Processed]:
+    """Return the manifest entry of a file that needs no processing, None if it does.
+
+    Args:
+        path:  Path of the png
+        entry: Manifest entry recorded for it, None if it was never processed
+
+    Notes:
+        A touched file whose contents are unchanged gets a fresh entry with its new modification time.
+
+    """
+    if entry is None:
+        return None
+    stat = os.stat(path)
+    if (stat.st_size, stat.st_mtime_ns) == (entry.size, entry.mtime):
+        return entry
+    with open(path, "rb") as source:
+        if digest(source.read()) == entry.sha256:
+            return Processed(stat.st_size, stat.st_mtime_ns, entry.sha256)
+    return None
+
+
+def build(directory: str = "assets", processes: Optional[int] = None, force: bool = False) -> List[str]:
+    """Greenscreen every sprite and UI piece that changed since the last build.
+
+    Args:
+        directory: Assets directory containing sprites and ui folders
+        processes: Number of worker processes, one per core if not given
+        force:     Process every file, ignoring the manifest
+
+    Returns:
+        Paths that were processed, relative to the assets directory
+
+    Raises:
+        AssetError: Some files failed validation, every other file is still processed and recorded
+
+    """
+    logger = logging.getLogger(__name__)
+    manifest = {} if force else load_manifest(directory)
+    names = sorted(
+        os.path.relpath(path, directory) for pattern in PATTERNS for path in glob.glob(os.path.join(directory, pattern))
+    )
+
+    pending = []
+    current = {}
+    for name in names:
+        entry = is_current(os.path.join(directory, name), manifest.get(name))
+        if entry is None:
+            pending.append(name)
+        else:
+            current[name] = entry
+
+    failures = []
+    if pending:
+        with Pool(processes) as pool:
+            results = [pool.apply_async(process, (os.path.join(directory, name),)) for name in pending]
+            for name, result in zip(pending, results):
+                try:
+                    current[name] = result.get()
+                except AssetError as e:
+                    failures.append(str(e))
+    save_manifest(directory, current)
+    logger.info(f"Processed {len(pending) - len(failures)} of {len(names)} assets in {directory}")
+
+    if failures:
+        raise AssetError("\n".join(failures))
+    return [name for name in pending if name in current]
@@ -1,12 +1,157 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-"""Carry pokemon information and related methods."""
+"""Carry pokemon information and related methods.
 
-from typing import List
+Notes:
+    The database modules, and SQLAlchemy with them, are imported on first
+    use, so loading species from a snapshot file never imports them.
+
+"""
+
+from typing import TYPE_CHECKING, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from PIL import Image  # type: ignore
+import dex.assets as assets
+import dex.trace as trace
+import json
 import logging
-import db.pokeschema as pokeschema  # type: ignore
+import os
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session  # type: ignore
+
+
+class SpeciesRecord(NamedTuple):
+    """Read-only display data for a single species."""
+
+    id: int
+    species: str
+    classification: str
+    height: float
+    weight: float
+    entries: Tuple[str, ...]
+
+
+class DexSnapshot:
+    """Read-only in-memory copy of the display data for every species.
+
+    Attributes:
+        records (list of SpeciesRecord): Records indexed by national dex id,
+            None where the database has no row
+
+    """
+
+    def __init__(self, records: List[Optional[SpeciesRecord]]):
+        """Initialize a snapshot from prepared records.
+
+        Args:
+            records: Records indexed by national dex id
+
+        """
+        self.records = records
+
+    @classmethod
+    def from_records(cls, records: Iterable[SpeciesRecord]) -> "DexSnapshot":
+        """Build a snapshot from records in any order.
+
+        Args:
+            records: One record per species
+
+        """
+        records = list(records)
+        indexed: List[Optional[SpeciesRecord]] = [None] * (max((record.id for record in records), default=0) + 1)
+        for record in records:
+            indexed[record.id] = record
+        return cls(indexed)
+
+    @classmethod
+    def load(cls, session: "Session") -> "DexSnapshot":
+        """Build a snapshot with a single query over pokemon and their entries.
+
+        Args:
+            session: Database session to query
+
+        """
+        import db.pokeschema as pokeschema  # type: ignore
+
+        with trace.span("db.snapshot"):
+            rows = (
+                session.query(
+                    pokeschema.Pokemon.id,
+                    pokeschema.Pokemon.species,
+                    pokeschema.Pokemon.classification,
+                    pokeschema.Pokemon.height,
+                    pokeschema.Pokemon.weight,
+                    pokeschema.Entry.entry,
+                )
+                .outerjoin(pokeschema.Entry, pokeschema.Entry.pokemon_id == pokeschema.Pokemon.id)
+                .order_by(pokeschema.Pokemon.id, pokeschema.Entry.id)
+                .all()
+            )
+
+        fields = {}
+        entries: dict = {}
+        for id, species, classification, height, weight, entry in rows:
+            if id not in fields:
+                fields[id] = (species, classification, height, weight)
+                entries[id] = []
+            if entry is not None:
+                entries[id].append(entry)
+
+        return cls.from_records(
+            SpeciesRecord(id, species, classification, height, weight, tuple(entries[id]))
+            for id, (species, classification, height, weight) in fields.items()
+        )
+
+    @classmethod
+    def read(cls, filename: str) -> "DexSnapshot":
+        """Load a snapshot written by dump, without touching the database.
+
+        Args:
+            filename: Path of the snapshot file
+
+        """
+        with trace.span("snapshot.read"), open(filename) as snapshot_file:
+            rows = json.load(snapshot_file)
+        return cls.from_records(
+            SpeciesRecord(id, species, classification, height, weight, tuple(entries))
+            for id, species, classification, height, weight, entries in rows
+        )
+
+    def dump(self, filename: str) -> None:
+        """Write the snapshot to a JSON file, one [id, species, classification, height, weight, entries] row each.
+
+        Args:
+            filename: Path of the snapshot file, replaced atomically
+
+        """
+        temp = filename + ".tmp"
+        with open(temp, "w") as out:
+            json.dump([list(record) for record in self], out)
+        os.replace(temp, filename)
+
+    @property
+    def ids(self) -> List[int]:
+        """National dex ids present in the snapshot."""
+        return [record.id for record in self]
+
+    def __getitem__(self, id: int) -> SpeciesRecord:
+        record = self.records[id] if 0 <= id < len(self.records) else None
+        if record is None:
+            raise KeyError(id)
+        return record
+
+    def __contains__(self, id: int) -> bool:
+        return 0 <= id < len(self.records) and self.records[id] is not None
+
+    def __iter__(self) -> Iterator[SpeciesRecord]:
+        return (record for record in self.records if record is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"DexSnapshot(species={len(self)})"
 
 
 class Pokemon:
@@ -23,11 +168,15 @@ class Pokemon:
 
     """
 
-    def __init__(self, id: int, session):
+    def __init__(self, id: int, session: "Session" = None, snapshot: DexSnapshot = None, pool: assets.AssetPool = None):
         """Initialize values for pokemon object.
 
         Args:
-            number: National dex number of pokemon to create
+            number:   National dex number of pokemon to create
+            session:  Database session to load data from, the calling thread's session
+                      on the default database if not given
+            snapshot: Preloaded snapshot to load data from instead of the session
+            pool:     Asset pool to take sprites from, the shared pool if not given
 
         """
         self.logger = logging.getLogger(__name__)
@@ -40,28 +189,47 @@ class Pokemon:
         self.entries: List[str] = []
         self.sprites: List[Image.Image] = []
         self.footprint: Image.Image
-        self.load_images()
-        self.load_data(session)
+        self.sprite_set: assets.SpriteSet
+        self.load_images(pool if pool is not None else assets.pool)
+        if snapshot is not None:
+            self.load_record(snapshot[id])
+        else:
+            self.load_data(session)
 
     def __repr__(self) -> str:
         return f"Pokemon({self.id})"
 
-    def load_images(self) -> None:
-        """Load sprites and footprint from spritesheet."""
-        sprite_sheet = Image.open(f"assets/sprites/{self.id:03d}.png")
-        self.sprites.append(sprite_sheet.crop((0, 0, 56, 56)))
-        self.sprites.append(sprite_sheet.crop((0, 56, 56, 112)))
-        self.footprint = sprite_sheet.crop((0, 112, 16, 128))
+    def load_images(self, pool: assets.AssetPool) -> None:
+        """Load sprites and footprint from spritesheet through the asset pool."""
+        self.sprite_set = pool.sprite_set(self.id)
+        self.sprites = [sprite.image for sprite in self.sprite_set.sprites]
+        self.footprint = self.sprite_set.footprint.image
+
+    def load_record(self, record: SpeciesRecord) -> None:
+        """Load pokemon data from a snapshot record."""
+        self.species = record.species
+        self.classification = record.classification
+        self.height = record.height
+        self.weight = record.weight
+        self.entries = list(record.entries)
+
+    def load_data(self, session: "Session" = None) -> None:
+        """Load pokemon data from database, the default database if no session is given."""
+        import db.profiles as profiles  # type: ignore
+
+        if session is None:
+            import db.database as database  # type: ignore
+
+            session = database.get_session()
 
-    def load_data(self, session) -> None:
-        """Load pokemon data from database."""
         # load from DB based on ID
-        mon = session.query(pokeschema.Pokemon).filter_by(id=self.id).first()
+        with trace.span("db.get_pokemon", id=self.id):
+            mon = profiles.get_pokemon(session, self.id, "display")
+            self.entries = [entry.entry for entry in mon.entries]
         self.species = mon.species
         self.classification = mon.classification
         self.height = mon.height
         self.weight = mon.weight
-        self.entries = [entry.entry for entry in mon.entries]
         # self.species = "Magikarp"
         # self.classification = "Fish"
         # self.height = 0.9
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Compose dex entry frames for inky displays.
+
+Todo:
+    Formatter class or module for building pasteable strings, floats?
+
+"""
+
+from functools import lru_cache
+from typing import Callable, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+from PIL import Image, ImageDraw  # type: ignore
+from dex.font import Font
+from dex.poke import Pokemon
+from dex.screen import Screen, load_screen
+import dex.layout as layout
+import dex.assets as assets
+import dex.trace as trace
+import dex.util as util
+import logging
+import logging.config
+import os
+import random
+
+ENTRY_LINE_GAP = 4
+PANEL_ROTATION = 180
+
+
+def gsc_format(entry: str) -> str:
+    """Replace character patterns with unique characters to work with gscfont.
+
+    Args:
+        entry: The entry to be formatted
+
+    Returns:
+        A string with character replacements performed
+
+    Notes:
+        The gscfont file contains special characters that exist as one of the following:
+            Combination character with apostrophe and character sharing same char slot
+            Symbol
+            Combined letters for special use
+
+        If using gscfont this replacement process should be done before wrapping the entry
+
+    Todo:
+        There may be a better way to handle this than using special characters, look in to it
+        Notate somewhere which special characters are used for what character on the sheet
+        Clean up replacements
+
+    """
+    partial = entry.replace("'d", "ⓓ").replace("'l", "ⓛ").replace("'m", "ⓜ").replace("'r", "ⓡ")
+    finished = partial.replace("'s", "ⓢ").replace("'t", "ⓣ").replace("'v", "ⓥ")
+    return finished
+
+
+def entry_wrap(entry: str, line_length: int = 17, line_count: int = 7) -> List[str]:
+    """Split an entry into separate lines to account for text wrap.
+
+    Args:
+        entry:       The entry to be wrapped
+        line_length: The maximum length of each line for display
+                     Defaults to 17, the maximum on a PHAT using the gscfont
+        line_count:  The maximum number of lines for display
+                     Defaults to 7, the maximum on a PHAT using the gscfont
+
+    Returns:
+        A list of strings, one for each line to be displayed
+
+    Raises:
+        IndexError: Entry too long to be displayed on one screen given restrictions
+
+    Notes:
+        Lines are measured in characters only, dex.layout.layout_entry measures
+        with the font in use and pages entries that won't fit on one screen.
+
+    """
+    lines = layout.wrap(entry, line_length, len)
+    if len(lines) > line_count:
+        raise IndexError(f"Entry needs {len(lines)} lines, only {line_count} available")
+    return lines + [""] * (line_count - len(lines))
+
+
+def display_char(img: Image, font: Font, location: Tuple[int, int], character: str) -> None:
+    """Paste a single character from a fontsheet to the display image.
+
+    Args:
+        img:         The display image to be pasted into
+        font:        The font class in use
+        location:    (x, y) location tuple to paste character
+        character:   Character to be pasted
+
+    Notes:
+        X and Y coordinates are anchored to the top left pixel of the character,
+        and 0,0 is the top left of the display
+
+    """
+    # sheet = font.sheetstring
+    # (
+    #     "ABCDEFGHIJKLMNOPQRSTUVWXYZ():;[]abcdefghijklmnopqrstuvwxyz      "
+    #     "ÄÖÜäöü          ⓓⓛⓜⓡⓢⓣⓥ       ⓃⓄ'①②-  ?!.&é ▷▶▼♂$×./,♀0123456789"
+    # )
+    # sheet_x = (sheet.index(character) % font.sheetwidth) * font.charwidth
+    # sheet_y = (int(sheet.index(character) / font.sheetwidth)) * font.charheight
+
+    # char_sprite = font.crop((sheet_x, sheet_y, sheet_x + char_width, sheet_y + char_height))
+    glyph = font.get_glyph(character)
+    util.blit(img, glyph.sprite, location, glyph.mask)
+
+
+def display_line(img: Image, font: Font, location: Tuple[int, int], line: str) -> None:
+    """Paste an entire line into a display image using characters from a fontsheet.
+
+    Args:
+        img:         The display image to be pasted into
+        font:        The font class
+        location:    (x, y) location tuple to paste character
+        line:        Line to be pasted
+
+    Notes:
+        X and Y coordinates are anchored to the top left pixel of the
+        first character of the line, 0,0 is the top left of the display
+
+    """
+    for character, index in zip(line, range(len(line))):
+        display_char(img, font, (location[0] + font.charwidth * index, location[1]), character)
+
+
+@trace.traced()
+def display_lines(img: Image, font: Font, location: Tuple[int, int], lines: List[str], line_gap: int = 4) -> None:
+    """Paste multiple lines into a display image using characters from a fontsheet.
+
+    Args:
+        img:         The display image to be pasted into
+        font:        The font class
+        location:    (x, y) location tuple to paste character
+        lines:       List of lines to be pasted
+        line_gap:    Distance in pixels to separate each line
+
+    Notes:
+        X and Y coordinates are anchored to the top left pixel of the first
+        character of the first line, 0,0 is the top left of the display.
+
+        The lines are left aligned to the X coordinate
+
+    """
+    for line, index in zip(lines, range(len(lines))):
+        display_line(img, font, (location[0], location[1] + index * (font.charheight + line_gap)), line)
+
+
+@trace.traced()
+def display_sprite(
+    img: Image, location: Tuple[int, int], mon: Pokemon, pool: assets.AssetPool = None, variant: int = None
+) -> None:
+    """Paste sprite and bounding box into display image.
+
+    Args:
+        img:      The display image to be pasted into
+        location: (x, y) location tuple to paste character
+        id:       Id of the pokemon sprite to paste
+        gen:      Generation to pull sprite from
+        ver:      Version within generation to pull sprite from
+        form:     Choose form if pokemon has more than one
+        pool:     Asset pool to take the sprite box and sprite from, the shared pool
+                  and the pokemon's own sprites if not given
+        variant:  Index of the sprite frame to paste, random if not given
+
+    Notes:
+        X and Y coordinates are anchored to the top left of the bounding box
+        for the sprite, 0,0 is the top left of the display.
+
+    Todo:
+        Sprites are currently stored using sprites from gen 2, but without
+        an indicator by filename to indicate generation. I think the best
+        solution may be to make each sprite file a full sheet, with gen 1 left
+        aligned. This will require shifting all of the sprites over 56 pixels
+        as they are gen 2, but it would help expansion in the future if done now.
+
+    """
+    box = (pool if pool is not None else assets.pool).ui("spritebox")
+    sprite_set = pool.sprite_set(mon.id) if pool is not None else mon.sprite_set
+
+    # TODO: Put this next line in a try/except or get index errors for high gens
+    # sprite = sprite_sheet.crop((0, 56 * ver, 56, 56 + 56 * ver))
+    if variant is None:
+        sprite = random.choice(sprite_set.sprites)
+    else:
+        sprite = sprite_set.sprites[variant]
+
+    # the sprite sits centred in the box, 6 pixels in at the box's own scale
+    inset = (box.image.width - sprite.image.width) // 2
+    util.blit(img, box.image, location, box.mask)
+    util.blit(img, sprite.image, tuple(n + inset for n in location), sprite.mask)
+
+
+@trace.traced()
+def display_footprint(img: Image, location: Tuple[int, int], mon: Pokemon, pool: assets.AssetPool = None) -> None:
+    """Paste footprint sprite into display image.
+
+    Args:
+        img:      The display image to be pasted into
+        location: (x, y) location tuple to paste character
+        id:       Id of the pokemon footprint to paste
+        pool:     Asset pool to take the footprint from, the pokemon's own footprint if not given
+
+    Notes:
+        X and Y coordinates are anchored to the top left of the footprint
+        sprite area, 0,0 is the top left of the display.
+
+    """
+    footprint = (pool.sprite_set(mon.id) if pool is not None else mon.sprite_set).footprint
+    util.blit(img, footprint.image, location, footprint.mask)
+
+
+@trace.traced()
+def display_numeric(img: Image.Image, font: Font, location: Tuple[int, int], width: int, mon: Pokemon) -> None:
+    """Paste numeric data into display image.
+
+    Args:
+        img:      Display image to be pasted into
+        font:     Fontsheet image
+        location: (x, y) location tuple to paste character
+        width:    How wide the section should be
+        data:     Numeric data to be pasted
+                  Tuple with data in the following order:
+                    ID
+                    Height
+                    Weight
+
+    Notes:
+        X and Y coordinates are the top left of the ID line for numeric data
+        0,0 is the top left of the display
+        Too many digits in height or weight for given width may cause issues
+        Gaps and underlines grow with the font's scale
+
+    """
+    # setup for final numeric data image
+    underline = 2
+    line_gap = 4 * font.scale
+    height = 3 * font.charwidth + 2 * line_gap + font.scale
+    final = Image.new("P", (width, height))
+    draw = ImageDraw.Draw(final)
+
+    x = 0
+    y = 0
+
+    # ID section
+    temp = font.string_run("ⓃⓄ")
+    util.blit(final, temp.image, (x, y), temp.mask)
+    x = width - 3 * font.charwidth
+    temp = font.numeral_run(mon.id)
+    util.blit(final, temp.image, (x, y), temp.mask)
+    x = 0
+    y += font.charheight
+    draw.rectangle((x, y, width, y + font.scale - 1), underline)
+
+    # Height section
+    y += line_gap
+    temp = font.string_run("HT")
+    util.blit(final, temp.image, (x, y), temp.mask)
+    temp = font.numeral_run(mon.height, suffix="m")
+    x = width - temp.image.width
+    util.blit(final, temp.image, (x, y), temp.mask)
+    x = 0
+    y += font.charheight
+    draw.rectangle((x, y, width, y + font.scale - 1), underline)
+
+    # Weight section
+    y += line_gap
+    temp = font.string_run("WT")
+    util.blit(final, temp.image, (x, y), temp.mask)
+    temp = font.numeral_run(mon.weight, suffix="kg")
+    x = width - temp.image.width
+    util.blit(final, temp.image, (x, y), temp.mask)
+    y += font.charheight
+    draw.rectangle((0, y, width, y + font.scale - 1), underline)
+
+    # runs are blitted onto a background of index 0, so the panel holds no transparent pixels
+    img.paste(final, location)
+
+
+@trace.traced()
+def display_taxonomy(img: Image.Image, font: Font, location: Tuple[int, int], width: int, mon: Pokemon) -> None:
+    """Paste taxonomic information into display image.
+
+    Args:
+        img: Display image to paste into
+
+    """
+    underline = 2
+    line_gap = 3 * font.scale
+    height = 2 * font.charheight + 2 * line_gap
+    final = Image.new("P", (width, height))
+    draw = ImageDraw.Draw(final)
+
+    x = 0
+    y = 0
+
+    # Species
+    temp = font.string_run(mon.species.upper())
+    util.blit(final, temp.image, (x, y), temp.mask)
+    y += font.charheight
+    draw.rectangle((0, y, width, y + font.scale - 1), underline)
+
+    # Classification
+    y += line_gap
+    temp = font.string_run(mon.classification.upper())
+    util.blit(final, temp.image, (x, y), temp.mask)
+    x += font.charwidth * len(mon.classification)
+    temp = font.string_run("①②")
+    util.blit(final, temp.image, (x, y), temp.mask)
+    y += font.charheight
+    draw.rectangle((0, y, width, y + font.scale - 1), underline)
+
+    # runs are blitted onto a background of index 0, so the panel holds no transparent pixels
+    img.paste(final, location)
+
+
+class FrameContext(NamedTuple):
+    """Everything a render plan step needs to draw its panel."""
+
+    font: Font
+    mon: Pokemon
+    entry_font: Font
+    lines: Tuple[str, ...]
+    pool: Optional[assets.AssetPool]
+    variant: Optional[int]
+
+
+class Step(NamedTuple):
+    """Single panel of a render plan, with its area, a key identifying what it draws and its draw call."""
+
+    name: str
+    rect: Tuple[int, int, int, int]
+    key: Callable[[FrameContext], Hashable]
+    draw: Callable[[Image.Image, FrameContext], None]
+
+
+@lru_cache(maxsize=16)
+def compile_plan(screen: Screen, font: Font) -> Tuple[Step, ...]:
+    """Compile a screen layout into a flat list of panel draw steps with their areas precomputed.
+
+    Args:
+        screen: Screen layout to compile
+        font:   The font class in use, which sizes the numeric and taxonomy panels
+
+    Notes:
+        Fixed size panels are sized at the screen's scale, and the font is
+        the scaled font frame_context draws with.
+
+        Each step binds its panel origin and size once and calls back into
+        the panel's display function, rather than flattening the panel into
+        individual pastes. What a panel pastes depends on the species and
+        entry being drawn, glyph runs, numerals and sprite frames, so those
+        offsets can only be worked out per frame, and the display functions
+        already cache the glyph runs and assets they paste.
+
+    """
+    font = font.scaled(screen.scale)
+    steps = []
+    for name, panel in screen.panels:
+        location = (panel.x, panel.y)
+        if name == "sprite":
+            size = (assets.SPRITE_FRAMES[0][2] + 12) * screen.scale
+            steps.append(
+                Step(
+                    name,
+                    (panel.x, panel.y, panel.x + size, panel.y + size),
+                    lambda ctx: (ctx.mon.id, ctx.variant),
+                    lambda img, ctx, location=location: display_sprite(img, location, ctx.mon, ctx.pool, ctx.variant),
+                )
+            )
+        elif name == "numeric":
+            height = 3 * font.charwidth + 2 * 4 * font.scale + font.scale
+            steps.append(
+                Step(
+                    name,
+                    (panel.x, panel.y, panel.x + panel.width, panel.y + height),
+                    lambda ctx: (ctx.font, ctx.mon.id, ctx.mon.height, ctx.mon.weight),
+                    lambda img, ctx, location=location, width=panel.width: display_numeric(
+                        img, ctx.font, location, width, ctx.mon
+                    ),
+                )
+            )
+        elif name == "entry":
+            steps.append(
+                Step(
+                    name,
+                    (panel.x, panel.y, panel.x + panel.width, panel.y + panel.height),
+                    lambda ctx: (ctx.entry_font, ctx.lines),
+                    lambda img, ctx, location=location, line_gap=entry_box(screen).line_gap: display_lines(
+                        img, ctx.entry_font, location, list(ctx.lines), line_gap
+                    ),
+                )
+            )
+        elif name == "taxonomy":
+            height = 2 * font.charheight + 2 * 3 * font.scale
+            steps.append(
+                Step(
+                    name,
+                    (panel.x, panel.y, panel.x + panel.width, panel.y + height),
+                    lambda ctx: (ctx.font, ctx.mon.species, ctx.mon.classification),
+                    lambda img, ctx, location=location, width=panel.width: display_taxonomy(
+                        img, ctx.font, location, width, ctx.mon
+                    ),
+                )
+            )
+        elif name == "footprint":
+            frame = assets.FOOTPRINT_FRAME
+            steps.append(
+                Step(
+                    name,
+                    (
+                        panel.x,
+                        panel.y,
+                        panel.x + (frame[2] - frame[0]) * screen.scale,
+                        panel.y + (frame[3] - frame[1]) * screen.scale,
+                    ),
+                    lambda ctx: ctx.mon.id,
+                    lambda img, ctx, location=location: display_footprint(img, location, ctx.mon, ctx.pool),
+                )
+            )
+    return tuple(steps)
+
+
+def entry_box(screen: Screen) -> layout.Box:
+    """Return the entry text box of a screen."""
+    panel = screen.panel("entry")
+    return layout.Box(panel.width, panel.height, ENTRY_LINE_GAP * screen.scale)
+
+
+def frame_context(
+    font: Font,
+    mon: Pokemon,
+    screen: Screen,
+    entry: str = None,
+    pool: assets.AssetPool = None,
+    entry_fonts: Sequence[Font] = None,
+    page: int = 0,
+    variant: int = None,
+) -> Tuple[FrameContext, int]:
+    """Lay out the entry and gather what a render plan needs to draw a frame.
+
+    Returns:
+        The frame context and the number of pages the entry is laid out across
+
+    Notes:
+        On a scaled screen the fonts and asset pool are swapped for their
+        upscaled counterparts, which are built once per scale and reused.
+
+        A page past the last shows the last page, so displays that lay an
+        entry out across different numbers of pages can be stepped together.
+
+    """
+    if entry is None:
+        entry = random.choice(mon.entries)
+    if screen.scale != 1:
+        pool = (pool if pool is not None else assets.pool).scaled(screen.scale)
+    entry_fonts = tuple(entry_font.scaled(screen.scale) for entry_font in entry_fonts or (font,))
+    font = font.scaled(screen.scale)
+    entry_layout = layout.layout_entry(entry, entry_fonts, entry_box(screen))
+    page = min(page, len(entry_layout.pages) - 1)
+    context = FrameContext(font, mon, entry_layout.font, entry_layout.pages[page], pool, variant)
+    return context, len(entry_layout.pages)
+
+
+def run_plan(plan: Sequence[Step], img: Image.Image, context: FrameContext) -> None:
+    """Draw every step of a render plan into a display image."""
+    for step in plan:
+        step.draw(img, context)
+
+
+def render_frame(
+    img: Image.Image,
+    font: Font,
+    mon: Pokemon,
+    entry: str = None,
+    pool: assets.AssetPool = None,
+    entry_fonts: Sequence[Font] = None,
+    page: int = 0,
+    variant: int = None,
+    screen: Screen = None,
+) -> int:
+    """Compose a full dex entry frame into a display image.
+
+    Args:
+        img:         Display image to paste into
+        font:        The font class in use
+        mon:         Pokemon to display
+        entry:       Dex entry to display, a random entry for the pokemon if not given
+        pool:        Asset pool to take UI pieces from, the shared pool if not given
+        entry_fonts: Candidate fonts for the entry text, largest first, only font if not given
+        page:        Page of the entry to display when it doesn't fit on one frame
+        variant:     Index of the sprite frame to display, random if not given
+        screen:      Screen layout to draw with, the PHAT layout if not given
+
+    Returns:
+        Number of pages the entry is laid out across
+
+    """
+    screen = screen or load_screen()
+    with trace.span("render_frame", id=mon.id):
+        context, pages = frame_context(font, mon, screen, entry, pool, entry_fonts, page, variant)
+        run_plan(compile_plan(screen, font), img, context)
+    return pages
+
+
+def setup_logging(config: str = "config/logging.ini") -> logging.Logger:
+    """Create the logs folder if needed and load logging configuration.
+
+    Args:
+        config: Path to the logging configuration file
+
+    Returns:
+        Logger for the calling script
+
+    """
+    try:
+        os.mkdir("logs")
+    except FileExistsError:
+        dir_created = False
+    else:
+        dir_created = True
+    finally:
+        logging.config.fileConfig(config)
+        logger = logging.getLogger(__name__)
+        if dir_created:
+            logger.info("Logs folder was not present, was created")
+    return logger
+
+
+def init_display(colour: str = "yellow", screen: Screen = None):
+    """Initialize an inky display if one is available.
+
+    Args:
+        colour: Colour variant of the display
+        screen: Screen layout naming the display type, the PHAT layout if not given
+
+    Returns:
+        Tuple of the inky display, or None if unavailable, and a blank image sized for it
+
+    """
+    logger = logging.getLogger(__name__)
+    screen = screen or load_screen()
+    try:
+        from inky import InkyPHAT, InkyWHAT  # type: ignore
+    except (ModuleNotFoundError, RuntimeError) as e:
+        logger.debug(f"Error initializing inky library: {e}")
+        return None, Image.new("P", screen.size)
+    inky_display = (InkyWHAT if screen.type == "what" else InkyPHAT)(colour)
+    inky_display.set_border(inky_display.BLACK)
+    return inky_display, Image.new("P", (inky_display.WIDTH, inky_display.HEIGHT))
+
+
+def panel_rect(rect: Tuple[int, int, int, int], size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """Map a rectangle of a composed frame to the area output_frame pushes it to on the panel.
+
+    Args:
+        rect: Left, top, right and bottom of the area in frame coordinates
+        size: Width and height of the frame
+
+    Returns:
+        The same area after the frame is rotated by PANEL_ROTATION degrees
+
+    """
+    left, top, right, bottom = rect
+    width, height = size
+    return (width - right, height - bottom, width - left, height - top)
+
+
+def output_frame(img: Image.Image, inky_display=None, filename: Optional[str] = "last_display.png") -> None:
+    """Push a composed frame to the display and save a preview copy.
+
+    Args:
+        img:          Composed display image
+        inky_display: Inky display to push the frame to, skipped if None
+        filename:     Path to save a preview png to, skipped if None
+
+    Notes:
+        Panels are mounted upside down, so the frame is rotated by
+        PANEL_ROTATION degrees before it is pushed, and areas of the frame
+        land on the panel where panel_rect puts them.
+
+    """
+    img = img.rotate(PANEL_ROTATION)
+    if inky_display is not None:
+        with trace.span("inky.show"):
+            inky_display.set_image(img)
+            inky_display.show()
+    if filename is not None:
+        with trace.span("preview.save"):
+            img.putpalette([255, 255, 255, 0, 0, 0, 255, 0, 0])
+            img = img.rotate(PANEL_ROTATION)
+            img.save(filename)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Load declarative screen layouts from config/screens.ini."""
+
+from configparser import ConfigParser
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+PANELS = ("sprite", "numeric", "entry", "taxonomy", "footprint")
+
+
+class Panel(NamedTuple):
+    """Placement of a single panel, width and height are 0 where a panel has a fixed size."""
+
+    x: int
+    y: int
+    width: int = 0
+    height: int = 0
+
+
+class Screen(NamedTuple):
+    """Display size and panel placement for one kind of display.
+
+    Panel positions are in display pixels, scale is the integer factor
+    sprites, fonts and fixed panel sizes are drawn at.
+
+    """
+
+    name: str
+    type: str
+    width: int
+    height: int
+    panels: Tuple[Tuple[str, Panel], ...]
+    scale: int = 1
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    def panel(self, name: str) -> Panel:
+        """Return the placement of a panel by name.
+
+        Raises:
+            KeyError: The screen has no such panel
+
+        """
+        for panel_name, panel in self.panels:
+            if panel_name == name:
+                return panel
+        raise KeyError(name)
+
+
+@lru_cache(maxsize=8)
+def load_screen(name: str = "phat", config: str = "config/screens.ini") -> Screen:
+    """Read a screen layout from the screens config file.
+
+    Args:
+        name:   Section name of the screen, such as 'phat' or 'what'
+        config: Path to the screens config file
+
+    Raises:
+        KeyError: The config has no section for the screen
+
+    """
+    parser = ConfigParser()
+    parser.read(config)
+    section = parser[name]
+    panels = tuple(
+        (panel, Panel(*(int(value) for value in section[panel].split(",")))) for panel in PANELS if panel in section
+    )
+    return Screen(
+        name,
+        section.get("type", name),
+        section.getint("width"),
+        section.getint("height"),
+        panels,
+        section.getint("scale", 1),
+    )
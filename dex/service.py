@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Resident render service keeping fonts, assets and the database loaded between frames.
+
+Notes:
+    Requests are single lines of text, each answered with a single line:
+
+        render          Render a random species
+        render <id>     Render the species with national dex id <id>
+        quit            Stop the service
+
+    Successful renders answer "ok <id>", anything else answers "error <reason>".
+
+    An entry too long for one frame is paged: while the entry on display has
+    pages left, render and render of the same id show its next page, with
+    the same sprite, instead of picking a new entry.
+
+"""
+
+from typing import List, NamedTuple, Optional, TextIO
+from dex.bundle import Bundle
+from dex.font import Font
+from dex.poke import DexSnapshot, Pokemon
+import dex.assets as assets
+import dex.trace as trace
+from dex.compositor import FrameUpdate
+from dex.fanout import Display, FanOut, load_displays
+from dex.screen import load_screen
+from db.database import open_database  # type: ignore
+import db.pokeschema as pokeschema  # type: ignore
+import logging
+import os
+import random
+import socket
+
+
+class Showing(NamedTuple):
+    """The entry on display and how far through its pages the displays are."""
+
+    id: int
+    entry: str
+    variant: int
+    page: int
+    pages: int
+
+
+class RenderService:
+    """Long running renderer that answers render requests.
+
+    Attributes:
+        font (Font): Font used for every frame, preloaded at startup
+        pool (AssetPool): Decoded sprites and UI pieces shared across renders
+        database (Database): Shared read-only database, its pooled connection reused across renders
+        snapshot (DexSnapshot): Preloaded species data, None to query the database per render
+        fanout (FanOut): Displays frames are composed for and pushed to
+        showing (Showing): Entry and page on display, None before the first render
+
+    """
+
+    def __init__(
+        self,
+        font: str = "assets/ui/gscfont.png",
+        database: str = "sqlite:///poke.db",
+        output: Optional[str] = "last_display.png",
+        colour: str = "yellow",
+        snapshot: bool = True,
+        preload: bool = False,
+        bundle: Optional[str] = None,
+        large_font: Optional[str] = None,
+        screen: str = "phat",
+        displays: Optional[str] = None,
+    ):
+        """Load fonts, UI assets, the database and the display once.
+
+        Args:
+            font:       Filename of the font image to load
+            database:   SQLAlchemy database url
+            output:     Path to save a preview png of each frame to, None to skip
+            colour:     Colour variant of the inky display
+            snapshot:   Load every species into memory up front instead of querying per render
+            preload:    Decode every sprite sheet at startup instead of on first use
+            bundle:     Path of an asset bundle to read the font and sprites from instead of png files
+            large_font: Filename of a larger font preferred for entries short enough to fit it
+            screen:     Name of the screen layout in config/screens.ini to draw with
+            displays:   Path of a displays config to drive several panels at once,
+                        replacing screen, colour and output
+
+        """
+        self.logger = logging.getLogger(__name__)
+        self.bundle = Bundle(bundle) if bundle is not None else None
+        self.font = Font(font, preload=True, bundle=self.bundle)
+        self.entry_fonts = (self.font,)
+        if large_font is not None:
+            self.entry_fonts = (Font(large_font, preload=True, bundle=self.bundle), self.font)
+        self.pool = assets.pool if self.bundle is None else assets.AssetPool(bundle=self.bundle)
+        if preload:
+            self.pool.preload()
+        self.database = open_database(database)
+        self.snapshot = DexSnapshot.load(self.database.session()) if snapshot else None
+        self.database.remove()
+        if displays is not None:
+            configured = load_displays(displays)
+        else:
+            configured = (Display(screen, load_screen(screen), colour, output),)
+        self.fanout = FanOut(configured, self.pool)
+        self.species_ids: List[int] = []
+        self.showing: Optional[Showing] = None
+        self.running = True
+
+    def render(self, id: Optional[int] = None) -> List[FrameUpdate]:
+        """Render a species and push it to every display.
+
+        Args:
+            id: National dex id of the species, a random species with a sprite sheet if not given
+
+        Returns:
+            The frame and changed regions of each display, the species rendered is in showing
+
+        Notes:
+            Only panels whose content changed are redrawn, and a display is
+            left alone when nothing on it changed. If the entry on display has
+            pages left and id is not given or is the same species, its next
+            page is shown instead.
+
+        """
+        showing = self.showing
+        entry: Optional[str] = None
+        variant: Optional[int] = None
+        page = 0
+        if showing is not None and showing.page + 1 < showing.pages and id in (None, showing.id):
+            id, entry, variant, page = showing.id, showing.entry, showing.variant, showing.page + 1
+        elif id is None:
+            if not self.species_ids:
+                if self.snapshot is not None:
+                    known = set(self.snapshot.ids)
+                else:
+                    known = {row.id for row in self.database.session().query(pokeschema.Pokemon.id)}
+                self.species_ids = [id for id in self.pool.sprite_ids() if id in known]
+            id = random.choice(self.species_ids)
+        with trace.frame("render", id=id, page=page):
+            mon = Pokemon(id, self.database.session(), self.snapshot, self.pool)
+            if entry is None or variant is None:
+                entry = random.choice(mon.entries)
+                variant = random.randrange(len(mon.sprite_set.sprites))
+            updates = self.fanout.render(self.font, mon, self.entry_fonts, entry, page, variant)
+        self.showing = Showing(id, entry, variant, page, max(update.pages for update in updates))
+        regions = [update.regions for update in updates]
+        self.logger.debug(f"Rendered {id} page {page + 1} of {self.showing.pages}, changed regions {regions}")
+        return updates
+
+    def handle(self, request: str) -> str:
+        """Answer a single request line.
+
+        Args:
+            request: Request line as described in the module notes
+
+        Returns:
+            The response line, without a trailing newline
+
+        """
+        words = request.split()
+        if not words:
+            return "error empty request"
+        if words[0] == "quit":
+            self.running = False
+            return "ok quit"
+        if words[0] != "render" or len(words) > 2:
+            return f"error unknown request '{request.strip()}'"
+        try:
+            id = int(words[1]) if len(words) == 2 else None
+        except ValueError:
+            return f"error invalid species '{words[1]}'"
+        try:
+            self.render(id)
+        except Exception as e:
+            self.logger.exception(f"Render of {id} failed")
+            return f"error {type(e).__name__}: {e}"
+        finally:
+            self.database.remove()
+        return f"ok {self.showing.id}"
+
+    def close(self) -> None:
+        """Stop the display worker threads and close the database."""
+        self.fanout.close()
+        self.database.close()
+
+    def serve_stream(self, infile: TextIO, outfile: TextIO) -> None:
+        """Answer requests read line by line from a stream until quit or end of input.
+
+        Args:
+            infile:  Stream to read requests from
+            outfile: Stream to write responses to
+
+        """
+        for line in infile:
+            outfile.write(self.handle(line) + "\n")
+            outfile.flush()
+            if not self.running:
+                break
+
+    def serve_socket(self, path: str) -> None:
+        """Answer requests from clients of a unix socket until quit.
+
+        Args:
+            path: Filesystem path of the socket, replaced if it already exists
+
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(path)
+            server.listen()
+            self.logger.info(f"Listening on {path}")
+            while self.running:
+                connection, _ = server.accept()
+                with connection, connection.makefile("r") as infile, connection.makefile("w") as outfile:
+                    self.serve_stream(infile, outfile)
+        finally:
+            server.close()
+            os.unlink(path)
+
+
+def request(path: str, line: str) -> str:
+    """Send a single request to a running service and return its response.
+
+    Args:
+        path: Filesystem path of the service socket
+        line: Request line as described in the module notes
+
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        with client.makefile("rw") as stream:
+            stream.write(line + "\n")
+            stream.flush()
+            return stream.readline().rstrip("\n")
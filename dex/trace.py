@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Time spans of the render pipeline and report where each frame spent its time.
+
+Notes:
+    Tracing is off until enable() is called. While off, span() hands back a
+    shared do-nothing context manager and traced functions call straight
+    through, so instrumented code pays a single flag check.
+
+    While on, every span is written as a complete event to an optional
+    Chrome trace file, viewable in chrome://tracing or Perfetto, and each
+    frame span logs one record to the dex.trace logger totalling the time
+    spent in each named span inside it:
+
+        frame render 129 412.9ms: db.get_pokemon 10.2ms, display_sprite 1.1ms, ..., inky.show 380.4ms
+
+    Spans nest per thread. Work handed to another thread, such as the
+    display pushes of dex.fanout, carries the spans open where it was handed
+    off with current() and reopens them there with adopt(), so its spans
+    still count towards the frame. Stages running in parallel each add their
+    own time, so a frame's stages can total more than the frame itself.
+
+    The trace file uses the JSON array format, which viewers accept without
+    the closing bracket, so events are appended as they finish and a killed
+    process still leaves a readable trace.
+
+"""
+
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, TextIO
+import json
+import logging
+import os
+import threading
+import time
+
+NULL_SPAN = nullcontext()
+
+
+class Span:
+    """Timed region of a trace, recorded when the with block exits.
+
+    Attributes:
+        name (str): Name the span is recorded and totalled under
+        args (dict): Extra values recorded with the span in the trace file
+        frame (bool): Whether the span is a frame, logging a record of the spans inside it
+
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, args: Dict, frame: bool = False):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.frame = frame
+        self.start = 0
+        self.stages: Dict[str, int] = {}
+
+    def __enter__(self) -> "Span":
+        self.tracer.stack().append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        duration = time.perf_counter_ns() - self.start
+        stack = self.tracer.stack()
+        stack.pop()
+        with self.tracer.lock:
+            for span in stack:
+                if span.frame:
+                    span.stages[self.name] = span.stages.get(self.name, 0) + duration
+        self.tracer.record(self, duration)
+
+
+class Tracer:
+    """Collects spans from every thread and writes them out while enabled.
+
+    Attributes:
+        enabled (bool): Whether spans are being recorded
+        logger (Logger): Logger frame records are written to
+
+    """
+
+    def __init__(self):
+        """Initialize a disabled tracer."""
+        self.enabled = False
+        self.logger = logging.getLogger("dex.trace")
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.file: Optional[TextIO] = None
+        self.epoch = 0
+
+    def enable(self, filename: str = None) -> None:
+        """Start recording spans.
+
+        Args:
+            filename: Chrome trace file to append events to, frame records are only logged if not given
+
+        """
+        self.disable()
+        if filename is not None:
+            self.file = open(filename, "w")
+            self.file.write("[\n")
+        self.epoch = time.perf_counter_ns()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop recording spans and close the trace file."""
+        self.enabled = False
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def stack(self) -> List[Span]:
+        """Return the spans open on the calling thread, innermost last."""
+        try:
+            return self.local.stack
+        except AttributeError:
+            self.local.stack = []
+            return self.local.stack
+
+    def current(self) -> List[Span]:
+        """Return a copy of the spans open on the calling thread, to reopen on another thread with adopt."""
+        return list(self.stack())
+
+    @contextmanager
+    def adopt(self, spans: Sequence[Span]) -> Iterator[None]:
+        """Nest the calling thread's spans inside spans opened on another thread.
+
+        Args:
+            spans: Spans returned by current on the thread handing off the work
+
+        Notes:
+            The spans are not entered again, spans finishing inside only add
+            their time to the adopted frames and are otherwise recorded on the
+            calling thread.
+
+        """
+        stack = self.stack()
+        self.local.stack = list(spans) + stack
+        try:
+            yield
+        finally:
+            self.local.stack = stack
+
+    def record(self, span: Span, duration: int) -> None:
+        """Write a finished span to the trace file, and log it if it is a frame.
+
+        Args:
+            span:     The finished span
+            duration: Time spent in the span in nanoseconds
+
+        """
+        if self.file is not None:
+            event = {
+                "name": span.name,
+                "ph": "X",
+                "ts": (span.start - self.epoch) / 1000,
+                "dur": duration / 1000,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": span.args,
+            }
+            line = json.dumps(event, default=str) + ",\n"
+            with self.lock:
+                if self.file is not None:
+                    self.file.write(line)
+                    self.file.flush()
+        if span.frame:
+            stages = ", ".join(f"{name} {total / 1e6:.1f}ms" for name, total in span.stages.items())
+            label = " ".join(str(value) for value in span.args.values())
+            self.logger.info(f"frame {span.name} {label} {duration / 1e6:.1f}ms: {stages}")
+
+    def span(self, name: str, /, **args):
+        """Return a context manager timing a region of code.
+
+        Args:
+            name: Name the span is recorded and totalled under
+            args: Extra values recorded with the span
+
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def frame(self, name: str, /, **args):
+        """Return a context manager timing a whole frame and logging the spans inside it.
+
+        Args:
+            name: Name the frame is recorded under
+            args: Extra values recorded with the frame, such as the species id
+
+        """
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args, frame=True)
+
+
+tracer = Tracer()
+
+
+def span(name: str, /, **args):
+    """Time a region of code on the shared tracer, see Tracer.span."""
+    if not tracer.enabled:
+        return NULL_SPAN
+    return Span(tracer, name, args)
+
+
+def frame(name: str, /, **args):
+    """Time a whole frame on the shared tracer, see Tracer.frame."""
+    return tracer.frame(name, **args)
+
+
+def current() -> List[Span]:
+    """Return the spans open on the calling thread on the shared tracer, see Tracer.current."""
+    if not tracer.enabled:
+        return []
+    return tracer.current()
+
+
+def adopt(spans: Sequence[Span]):
+    """Nest the calling thread's spans inside spans from another thread on the shared tracer, see Tracer.adopt."""
+    if not tracer.enabled or not spans:
+        return NULL_SPAN
+    return tracer.adopt(spans)
+
+
+def traced(name: str = None) -> Callable[[Callable], Callable]:
+    """Decorate a function so each call is a span on the shared tracer.
+
+    Args:
+        name: Name the span is recorded under, the function name if not given
+
+    """
+
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with Span(tracer, span_name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -4,35 +4,59 @@
 """Utility functions used in multiple dex files."""
 
 from PIL import Image  # type: ignore
-from typing import Tuple
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import struct
+import zlib
 
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+TRANSPARENT = 3
 
-def create_mask(source: Image.Image, mask: Tuple[int, int, int] = (0, 1, 2)) -> Image.Image:
-    """Create an image mask for pasting purposes.
+
+@lru_cache(maxsize=8)
+def alpha_table(transparent: int) -> List[int]:
+    """Build a palette index lookup table marking every index but one as opaque.
 
     Args:
-        source: Image to create the mask from
-        mask:   Tuple containing colormap indices to be masked
+        transparent: Palette index to leave out of the mask
+
+    """
+    return [0 if index == transparent else 255 for index in range(256)]
 
-                Default values are equivalent to white, black, and red
-                for an inky display
 
-    Returns:
-        An image mask for the source image
+def alpha_plane(source: Image.Image, transparent: int = TRANSPARENT) -> Image.Image:
+    """Return the paste mask of a palette image, covering every pixel but the transparent ones.
 
-    Attribution:
-        This method was written by the folks at pimoroni, and can be found within
-        their examples for their inky displays.
+    Args:
+        source:      Palette image to build the mask for
+        transparent: Palette index treated as transparent, the greenscreen index by default
 
     """
-    mask_image = Image.new("1", source.size)
-    w, h = source.size
-    for x in range(w):
-        for y in range(h):
-            p = source.getpixel((x, y))
-            if p in mask:
-                mask_image.putpixel((x, y), 255)
-    return mask_image
+    return source.point(alpha_table(transparent), "1")
+
+
+def blit(
+    dest: Image.Image,
+    source: Image.Image,
+    location: Tuple[int, int],
+    plane: Image.Image = None,
+    transparent: int = TRANSPARENT,
+) -> None:
+    """Paste a palette image, letting dest show through wherever source holds the transparent index.
+
+    Args:
+        dest:        Palette image to paste into
+        source:      Palette image to paste
+        location:    (x, y) of the top left corner of source within dest
+        plane:       Alpha plane of source kept from an earlier alpha_plane call, built here if not given
+        transparent: Palette index treated as transparent when the plane has to be built
+
+    Notes:
+        Assets, glyphs and text runs carry their plane, so pasting them never
+        builds a mask.
+
+    """
+    dest.paste(source, location, plane if plane is not None else alpha_plane(source, transparent))
 
 
 def get_real_bounds(source: Image.Image) -> Tuple[int, int, int, int]:
@@ -49,3 +73,66 @@ def get_real_bounds(source: Image.Image) -> Tuple[int, int, int, int]:
     remap[3] = 0
     remap[0] = 3
     return source.remap_palette(remap).getbbox()
+
+
+def scale_image(source: Image.Image, factor: int) -> Image.Image:
+    """Upscale an image by an integer factor without blending colours.
+
+    Args:
+        source: Image to scale, palette images keep their indices
+        factor: Whole number to multiply the width and height by
+
+    Returns:
+        The scaled image, or the source itself for a factor of 1
+
+    """
+    if factor == 1:
+        return source
+    return source.resize((source.width * factor, source.height * factor), Image.NEAREST)
+
+
+def read_png_text(filename: str) -> Dict[str, str]:
+    """Read the text chunks of a png without decoding or reading its image data.
+
+    Args:
+        filename: Path of the png
+
+    Returns:
+        Text values by keyword, from tEXt, zTXt and iTXt chunks
+
+    Raises:
+        ValueError: The file is not a png
+
+    Notes:
+        Chunks are streamed from the start of the file and reading stops at the
+        first IDAT chunk, so only the header of the file is read. Text chunks
+        after the image data are not seen, which is where sheets keep nothing.
+
+    """
+    text = {}
+    with open(filename, "rb") as png_file:
+        if png_file.read(8) != PNG_SIGNATURE:
+            raise ValueError(f"{filename} is not a png")
+        while True:
+            header = png_file.read(8)
+            if len(header) < 8:
+                break
+            length, chunk_type = struct.unpack(">I4s", header)
+            if chunk_type in (b"IDAT", b"IEND"):
+                break
+            if chunk_type not in (b"tEXt", b"zTXt", b"iTXt"):
+                png_file.seek(length + 4, 1)
+                continue
+            data = png_file.read(length)
+            png_file.seek(4, 1)
+            keyword, _, value = data.partition(b"\x00")
+            if chunk_type == b"tEXt":
+                text[keyword.decode("latin-1")] = value.decode("latin-1")
+            elif chunk_type == b"zTXt":
+                text[keyword.decode("latin-1")] = zlib.decompress(value[1:]).decode("latin-1")
+            else:
+                compressed = value[0]
+                _, _, value = value[2:].partition(b"\x00")
+                _, _, value = value.partition(b"\x00")
+                text[keyword.decode("latin-1")] = (zlib.decompress(value) if compressed else value).decode("utf-8")
+    return text
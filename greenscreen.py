@@ -13,35 +13,24 @@ Notes:
     the fourth color of the colormap.
 
     Once the image is saved in the assets directory this script can be run to clean
-    any images of greenscreen, leaving behind transparency.
+    any images of greenscreen, leaving behind transparency. Only files changed
+    since the last run are processed, see dex.pipeline.
 
 """
 
-
-from PIL import Image  # type: ignore
-import glob
-import re
-import png  # type: ignore
-
-for sprite in glob.glob("assets/sprites/*.png"):
-    pre_chunk_list = list(png.Reader(sprite).chunks())
-    img = Image.open(sprite)
-    img.save(sprite, transparency=3, optimize=1)
-    post_chunk_list = list(png.Reader(sprite).chunks())
-    for chunk in pre_chunk_list:
-        if re.compile(b"..Xt").match(chunk[0]):
-            post_chunk_list.insert(2, chunk)
-    with open(sprite, "wb") as out_sprite:
-        png.write_chunks(out_sprite, post_chunk_list)
-
-
-for ui_piece in glob.glob("assets/ui/*.png"):
-    pre_chunk_list = list(png.Reader(ui_piece).chunks())
-    img = Image.open(ui_piece)
-    img.save(ui_piece, transparency=3, optimize=1)
-    post_chunk_list = list(png.Reader(ui_piece).chunks())
-    for chunk in pre_chunk_list:
-        if re.compile(b"..Xt").match(chunk[0]):
-            post_chunk_list.insert(2, chunk)
-    with open(ui_piece, "wb") as out_ui_piece:
-        png.write_chunks(out_ui_piece, post_chunk_list)
+from dex.pipeline import AssetError, build
+import argparse
+import sys
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the greenscreen out of asset pngs.")
+    parser.add_argument("--assets", default="assets", help="assets directory containing sprites and ui folders")
+    parser.add_argument("--processes", type=int, help="worker processes, one per core by default")
+    parser.add_argument("--force", action="store_true", help="process every file, ignoring the manifest")
+    args = parser.parse_args()
+    try:
+        processed = build(args.assets, args.processes, args.force)
+    except AssetError as e:
+        sys.exit(str(e))
+    print(f"Processed {len(processed)} assets in {args.assets}")
@@ -13,9 +13,12 @@ Todo:
 from PyQt5 import QtWidgets  # type: ignore
 from PyQt5.QtWidgets import QApplication, QMainWindow  # type: ignore
 from PyQt5.QtGui import QPixmap  # type: ignore
+import os
 import sys
 import subprocess
 
+SOCKET_PATH = "dex.sock"
+
 
 class OutputChecker(QtWidgets.QWidget):
     def __init__(self, *args):
@@ -39,7 +42,12 @@ class OutputChecker(QtWidgets.QWidget):
         self.setFixedSize(vbox.sizeHint())
 
     def update_image(self):
-        subprocess.call(["python", "./dex-entry.py"])
+        if os.path.exists(SOCKET_PATH):
+            from dex.service import request
+
+            request(SOCKET_PATH, "render")
+        else:
+            subprocess.call(["python", "./dex-entry.py"])
         self.pixmap = QPixmap("last_display.png")
         self.image_label.setPixmap(self.pixmap)
 